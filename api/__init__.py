@@ -2,3 +2,5 @@ from .auth import auth_ns
 from .product_ns import product_ns
 from .categories_ns import categories_ns
 from .product_images_ns import product_images_ns
+from .analytics_ns import analytics_ns
+from .orders_ns import orders_ns
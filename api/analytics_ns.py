@@ -0,0 +1,181 @@
+from datetime import date, datetime, timedelta
+from functools import wraps
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_restx import Namespace, Resource, fields
+from sqlalchemy import func, select
+
+from exts import db
+from models import DailyCategorySales, DailyProductSales, Product, User
+from utilities import category_cache, serialize_with
+
+analytics_ns = Namespace("analytics", description="Sales analytics for admins")
+
+# Sales serialization models
+sales_fields = {
+    "orders": fields.Integer(),
+    "units": fields.Integer(),
+    "revenue": fields.Float(),
+}
+
+daily_sales_model = analytics_ns.model(
+    "DailySales", {"day": fields.Date(), **sales_fields}
+)
+
+analytics_category_model = analytics_ns.model(
+    "AnalyticsCategory", {"uuid": fields.String(), "name": fields.String()}
+)
+
+category_sales_model = analytics_ns.model(
+    "CategorySales",
+    {
+        "day": fields.Date(),
+        "category": fields.Nested(analytics_category_model),
+        **sales_fields,
+    },
+)
+
+product_sales_model = analytics_ns.model(
+    "ProductSales",
+    {"uuid": fields.String(), "product_name": fields.String(), **sales_fields},
+)
+
+range_params = {
+    "start": "First day, YYYY-MM-DD (default: 29 days before end)",
+    "end": "Last day, YYYY-MM-DD (default: today, UTC)",
+}
+
+
+def admin_required(func):
+    """Allow only signed in users holding the admin role"""
+
+    @wraps(func)
+    @jwt_required()
+    def decorated(*args, **kwargs):
+        user = db.session.get(User, int(get_jwt_identity()))
+        role = current_app.config["ANALYTICS_ADMIN_ROLE"]
+        if user is None or user.role is None or user.role.name != role:
+            analytics_ns.abort(403, "Admin access required")
+        return func(*args, **kwargs)
+
+    return decorated
+
+
+def parse_day_range():
+    """Inclusive day range from the start and end query parameters"""
+    try:
+        end = request.args.get("end")
+        end = date.fromisoformat(end) if end else datetime.utcnow().date()
+        start = request.args.get("start")
+        start = date.fromisoformat(start) if start else end - timedelta(days=29)
+    except ValueError:
+        analytics_ns.abort(400, "start and end must be dates as YYYY-MM-DD")
+
+    if start > end:
+        analytics_ns.abort(400, "start must not be after end")
+    limit = current_app.config["ANALYTICS_MAX_DAYS"]
+    if (end - start).days >= limit:
+        analytics_ns.abort(400, f"At most {limit} days can be requested at once")
+    return start, end
+
+
+def sales_totals(model):
+    """Summed measures of a rollup model"""
+    return (
+        func.sum(model.orders).label("orders"),
+        func.sum(model.units).label("units"),
+        func.sum(model.revenue).label("revenue"),
+    )
+
+
+@analytics_ns.route("/sales/daily")
+class DailySalesResource(Resource):
+    """Resource for store-wide sales per day"""
+
+    @admin_required
+    @serialize_with(daily_sales_model, as_list=True)
+    @analytics_ns.doc("get_daily_sales", params=range_params)
+    def get(self):
+        """Get orders, units and revenue per day"""
+        start, end = parse_day_range()
+        rows = db.session.execute(
+            select(DailyCategorySales.day, *sales_totals(DailyCategorySales))
+            .where(DailyCategorySales.day.between(start, end))
+            .group_by(DailyCategorySales.day)
+            .order_by(DailyCategorySales.day)
+        )
+        return [row._asdict() for row in rows], 200
+
+
+@analytics_ns.route("/sales/categories")
+class CategorySalesResource(Resource):
+    """Resource for sales per category per day"""
+
+    @admin_required
+    @serialize_with(category_sales_model, as_list=True)
+    @analytics_ns.doc(
+        "get_category_sales",
+        params={**range_params, "category": "Only this category UUID"},
+    )
+    def get(self):
+        """Get orders, units and revenue per category per day"""
+        start, end = parse_day_range()
+        query = select(DailyCategorySales).where(
+            DailyCategorySales.day.between(start, end)
+        )
+        if request.args.get("category"):
+            category = category_cache.get(request.args["category"])
+            if not category:
+                analytics_ns.abort(404, "Category not found")
+            query = query.where(DailyCategorySales.category_id == category.id)
+
+        categories = {category.id: category for category in category_cache.all()}
+        rows = db.session.execute(
+            query.order_by(DailyCategorySales.day, DailyCategorySales.category_id)
+        ).scalars()
+        return [
+            {
+                "day": row.day,
+                "category": categories.get(row.category_id),
+                "orders": row.orders,
+                "units": row.units,
+                "revenue": row.revenue,
+            }
+            for row in rows
+        ], 200
+
+
+@analytics_ns.route("/sales/products")
+class ProductSalesResource(Resource):
+    """Resource for the best selling products"""
+
+    @admin_required
+    @serialize_with(product_sales_model, as_list=True)
+    @analytics_ns.doc(
+        "get_product_sales",
+        params={**range_params, "limit": "Number of products (default 20, max 100)"},
+    )
+    def get(self):
+        """Get the products with the most revenue over a range of days"""
+        start, end = parse_day_range()
+        limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+        totals = (
+            select(DailyProductSales.product_id, *sales_totals(DailyProductSales))
+            .where(DailyProductSales.day.between(start, end))
+            .group_by(DailyProductSales.product_id)
+            .subquery()
+        )
+        rows = db.session.execute(
+            select(
+                Product.uuid,
+                Product.product_name,
+                totals.c.orders,
+                totals.c.units,
+                totals.c.revenue,
+            )
+            .join(totals, totals.c.product_id == Product.id)
+            .order_by(totals.c.revenue.desc(), Product.id)
+            .limit(limit)
+        )
+        return [row._asdict() for row in rows], 200
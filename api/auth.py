@@ -13,6 +13,7 @@ from flask_jwt_extended import (
 from flask_restx import fields, Namespace, Resource
 from exts import db
 from models import User
+from routing import read_primary
 from utilities import EmailService
 
 auth_ns = Namespace("auth", description="User Authentication")
@@ -140,6 +141,7 @@ class UserResource(Resource):
 @auth_ns.route("/verify/<string:token>")
 class VerifyUser(Resource):
 
+    @read_primary
     def get(self, token):
         """Verify User Account"""
         try:
@@ -160,6 +162,8 @@ class VerifyUser(Resource):
                 user.verification_token = new_token
                 user.verification_token_expires = new_token_expires
                 user.save()
+                # Keep the new token although the response is an error
+                db.session.commit()
 
                 # Send the verification token
                 EmailService.send_mail(
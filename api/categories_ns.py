@@ -2,9 +2,15 @@ from flask import jsonify, request, make_response
 from flask_restx import Namespace, Resource, fields
 
 from exts import db
-from models import Category
-from utilities import create_pagination_model
-from .product_ns import product_model
+from models import Category, Product
+from utilities import (
+    create_pagination_model,
+    paginate,
+    serialize_with,
+    cache_response,
+    category_cache,
+)
+from .product_ns import product_model, eager_load_products
 
 categories_ns = Namespace("categories", description="Categories Management")
 
@@ -26,10 +32,11 @@ category_product_pagination_model = create_pagination_model(
 @categories_ns.route("/")
 class CategoryList(Resource):
 
-    @categories_ns.marshal_list_with(category_model)
+    @cache_response
+    @serialize_with(category_model, as_list=True)
     def get(self):
         """List all categories"""
-        return Category.query.all()
+        return category_cache.all()
 
     @categories_ns.expect(category_model)
     def post(self):
@@ -45,8 +52,7 @@ class CategoryList(Resource):
                 )
 
             # Check if category exists
-            existing_category = Category.query.filter_by(name=category_name).first()
-            if existing_category:
+            if category_cache.by_name(category_name):
                 return make_response(
                     jsonify({"message": "Category already exists"}), 400
                 )
@@ -72,7 +78,7 @@ class CategoryResource(Resource):
         """Get category by uuid"""
         try:
             # Check if category is valid
-            category = Category.query.filter_by(uuid=uuid).first()
+            category = category_cache.get(uuid)
             if not category:
                 return make_response(jsonify({"message": "Invalid category"}), 400)
 
@@ -90,18 +96,18 @@ class CategoryResource(Resource):
             category_name = data.get("name").strip().lower()
 
             # Check if category is valid
-            category = Category.query.filter_by(uuid=uuid).first()
+            category = category_cache.get(uuid)
             if not category:
                 return make_response(jsonify({"message": "Invalid category"}), 400)
 
             # Check if new category name already exist
-            existing_category = Category.query.filter_by(name=category_name).first()
-            if existing_category:
+            if category_cache.by_name(category_name):
                 return make_response(
                     jsonify({"message": "Category already exists"}), 400
                 )
 
             # Update Category
+            category = db.session.get(Category, category.id)
             category.update(name=category_name)
             return make_response(
                 jsonify({"message": "Category name updated successfully"}), 200
@@ -116,12 +122,12 @@ class CategoryResource(Resource):
         """Delete a category"""
         try:
             # Check if category is valid
-            category = Category.query.filter_by(uuid=uuid).first()
+            category = category_cache.get(uuid)
             if not category:
                 return make_response(jsonify({"message": "Invalid category"}), 400)
 
             # Delete category
-            category.delete()
+            db.session.get(Category, category.id).delete()
             return make_response(
                 jsonify({"message": "Category deleted successfully"}), 200
             )
@@ -132,34 +138,38 @@ class CategoryResource(Resource):
             )
 
 
-@categories_ns.doc(params={"page": "Page number", "per_page": "Items per page"})
+@categories_ns.doc(
+    params={
+        "page": "Page number",
+        "per_page": "Items per page",
+        "count": "Total count: exact, cached or none",
+    }
+)
 @categories_ns.route("/<string:uuid>/products")
 class CategoryProducts(Resource):
 
-    @categories_ns.marshal_with(category_product_pagination_model)
+    @cache_response
+    @serialize_with(category_product_pagination_model)
     def get(self, uuid):
         """ "List all products in a category"""
         try:
             # Check if category is valid
-            category = Category.query.filter_by(uuid=uuid).first()
+            category = category_cache.get(uuid)
             if not category:
                 return make_response(jsonify({"message": "Invalid category"}), 400)
 
             page = int(request.args.get("page", 1))
             per_page = int(request.args.get("per_page", 10))
 
-            pagination = category.products(
-                page=page, per_page=per_page, error_out=False
+            products = Product.query.filter_by(category_id=category.id)
+            return paginate(
+                eager_load_products(products),
+                "products",
+                page,
+                per_page,
+                key=f"category-products:{category.id}",
             )
 
-            return {
-                "total": pagination.total,
-                "pages": pagination.pages,
-                "page": pagination.page,
-                "per_page": pagination.per_page,
-                "products": pagination.items,
-            }
-
         except Exception as e:
             return make_response(
                 jsonify({"message": f"Error loading products {str(e)}"}), 500
@@ -0,0 +1,133 @@
+import base64
+import binascii
+from datetime import datetime
+
+import orjson
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_restx import Namespace, Resource, fields
+from sqlalchemy import select, tuple_
+
+from exts import db
+from models import Order, Product, ProductImage
+from utilities import serialize_with
+
+orders_ns = Namespace("orders", description="Order history")
+
+# Order history serialization models
+order_product_model = orders_ns.model(
+    "OrderProduct",
+    {
+        "uuid": fields.String(attribute="product_uuid"),
+        "product_name": fields.String(),
+        "image_url": fields.String(),
+    },
+)
+
+order_model = orders_ns.model(
+    "Order",
+    {
+        "uuid": fields.String(),
+        "quantity": fields.Integer(),
+        "price": fields.Float(),
+        "status": fields.String(),
+        "created_at": fields.DateTime(),
+        "product": fields.Nested(order_product_model),
+    },
+)
+
+order_history_model = orders_ns.model(
+    "OrderHistory",
+    {
+        "orders": fields.List(fields.Nested(order_model)),
+        "has_more": fields.Boolean(),
+        "next_cursor": fields.String(),
+    },
+)
+
+
+def encode_cursor(order):
+    """Opaque cursor pointing just past an order in the history"""
+    value = orjson.dumps([order.created_at.isoformat(), order.id])
+    return base64.urlsafe_b64encode(value).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        orders_ns.abort(400, "Invalid cursor")
+
+
+def load_order_history(user_id, limit, cursor=None, status=None):
+    """One page of a user's orders, newest first, with product name and image"""
+    image_url = (
+        select(ProductImage.image_url)
+        .where(ProductImage.product_id == Order.product_id)
+        .order_by(ProductImage.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            Order.id,
+            Order.uuid,
+            Order.quantity,
+            Order.price,
+            Order.status,
+            Order.created_at,
+            Product.uuid.label("product_uuid"),
+            Product.product_name,
+            image_url.label("image_url"),
+        )
+        .join(Product, Product.id == Order.product_id)
+        .where(Order.user_id == user_id)
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit + 1)
+    )
+    if status:
+        query = query.where(Order.status == status)
+    if cursor:
+        query = query.where(
+            tuple_(Order.created_at, Order.id) < tuple_(*decode_cursor(cursor))
+        )
+
+    rows = db.session.execute(query).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "orders": [{**row._asdict(), "product": row} for row in rows],
+        "has_more": has_more,
+        "next_cursor": encode_cursor(rows[-1]) if has_more else None,
+    }
+
+
+@orders_ns.route("/")
+class OrderHistoryResource(Resource):
+    """Resource for the signed in user's order history"""
+
+    @jwt_required()
+    @serialize_with(order_history_model)
+    @orders_ns.doc(
+        "get_order_history",
+        params={
+            "limit": "Orders per page, at most 100",
+            "cursor": "next_cursor of the previous page",
+            "status": "Only orders in this status",
+        },
+    )
+    def get(self):
+        """Get the signed in user's orders, newest first"""
+        limit = request.args.get(
+            "limit", current_app.config["ORDER_HISTORY_PAGE_SIZE"], type=int
+        )
+        return (
+            load_order_history(
+                int(get_jwt_identity()),
+                max(1, min(limit, 100)),
+                cursor=request.args.get("cursor"),
+                status=request.args.get("status"),
+            ),
+            200,
+        )
@@ -4,12 +4,28 @@ from werkzeug.datastructures import FileStorage
 
 from exts import db
 from models import Product, ProductImage
-from utilities import save_file, delete_file, ALLOWED_IMAGE_EXTENSIONS
+from utilities import (
+    request_deadline,
+    save_file,
+    delete_file,
+    event_bus,
+    serialize_with,
+    cache_response,
+    ALLOWED_IMAGE_EXTENSIONS,
+)
 
 
 product_images_ns = Namespace("Product Images", description="Product images management")
 
 
+@event_bus.subscribe(models=(ProductImage,), background=True)
+def delete_image_files(changes):
+    """Remove image files once their rows are deleted for good"""
+    for change in changes:
+        if change.action == "deleted":
+            delete_file(change.values["image_url"])
+
+
 # Product Images serialization model
 product_image_model = product_images_ns.model(
     "ProductImage",
@@ -33,6 +49,8 @@ class ImageUploadResourse(Resource):
     @product_images_ns.expect(upload_parser)
     @product_images_ns.marshal_with(product_image_model)
     @product_images_ns.doc("upload_product_image")
+    # The budget includes receiving the upload
+    @request_deadline(60)
     def post(self):
         """Upload a new product image"""
         try:
@@ -70,7 +88,8 @@ class ImageUploadResourse(Resource):
 
 @product_images_ns.route("/image/<string:uuid>")
 class SingleImageResource(Resource):
-    @product_images_ns.marshal_with(product_image_model)
+    @cache_response
+    @serialize_with(product_image_model)
     @product_images_ns.doc("get_image")
     def get(self, uuid):
         """Get a specific image by UUID"""
@@ -84,13 +103,13 @@ class SingleImageResource(Resource):
         """Delete a specific image"""
         image = ProductImage.query.filter_by(uuid=uuid).first()
         image.delete()
-        delete_file(image.image_url)
         return {"message": "Image deleted successfully"}, 200
 
 
 @product_images_ns.route("/product/<string:uuid>")
 class ProductImagesResource(Resource):
-    @product_images_ns.marshal_list_with(product_image_model)
+    @cache_response
+    @serialize_with(product_image_model, as_list=True)
     @product_images_ns.doc("get_product_images")
     def get(self, uuid):
         """Get all images for a specific product"""
@@ -1,10 +1,28 @@
-from flask import current_app
+from flask import current_app, request, Response
 from flask_restx import Resource, Namespace, fields
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
 from werkzeug.datastructures import FileStorage
 
 from exts import db
-from models import Category, Product, ProductImage
-from utilities import save_file, delete_file, ALLOWED_IMAGE_EXTENSIONS
+from routing import read_only
+from models import (
+    Product,
+    ProductChange,
+    ProductImage,
+    RelatedProduct,
+    normalize_uuid,
+)
+from utilities import (
+    admission_priority,
+    request_deadline,
+    save_file,
+    serialize_with,
+    cache_response,
+    category_cache,
+    product_broadcaster,
+    ALLOWED_IMAGE_EXTENSIONS,
+)
 
 product_ns = Namespace("products", description="Products Management")
 
@@ -44,6 +62,31 @@ product_model = product_ns.model(
     },
 )
 
+# Product batch models
+product_batch_request_model = product_ns.model(
+    "ProductBatchRequest",
+    {"uuids": fields.List(fields.String, required=True)},
+)
+product_batch_model = product_ns.model(
+    "ProductBatch",
+    {
+        "products": fields.List(fields.Nested(product_model)),
+        "missing": fields.List(fields.String),
+    },
+)
+
+# Product change feed model
+product_changes_model = product_ns.model(
+    "ProductChanges",
+    {
+        "since": fields.Integer,
+        "next": fields.Integer(description="Token for the next request"),
+        "has_more": fields.Boolean,
+        "upserted": fields.List(fields.Nested(product_model)),
+        "deleted": fields.List(fields.String, description="UUIDs of deleted products"),
+    },
+)
+
 # Product creation model (for input)
 product_create_model = product_ns.model(
     "ProductCreate",
@@ -102,6 +145,78 @@ product_update_parser.add_argument("flash_sale", type=bool, help="Flash sale sta
 product_update_parser.add_argument("category_id", type=str, help="Category UUID")
 
 
+def eager_load_products(query):
+    """Load the category and images serialized by product_model up front"""
+    return query.options(joinedload(Product.category), selectinload(Product.images))
+
+
+def load_product_batch(uuids):
+    """Load products in the order of their uuids, listing the ones not found"""
+    uuids = list(dict.fromkeys(uuid.strip() for uuid in uuids if uuid.strip()))
+    if not uuids:
+        product_ns.abort(400, "At least one product uuid is required")
+    limit = current_app.config["PRODUCT_BATCH_MAX"]
+    if len(uuids) > limit:
+        product_ns.abort(400, f"At most {limit} products can be requested at once")
+
+    products = {
+        product.uuid: product
+        for product in eager_load_products(Product.query)
+        .filter(Product.uuid.in_(uuids))
+        .all()
+    }
+    found = [(uuid, products.get(normalize_uuid(uuid))) for uuid in uuids]
+    return {
+        "products": [product for _, product in found if product is not None],
+        "missing": [uuid for uuid, product in found if product is None],
+    }
+
+
+def load_product_changes(since, limit):
+    """Latest state of the products changed after a change token"""
+    changes = (
+        ProductChange.query.filter(ProductChange.id > since)
+        .order_by(ProductChange.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # Only the last change of each product counts
+    latest = {change.product_id: change for change in changes}
+    upserted_ids = [id for id, change in latest.items() if not change.deleted]
+    products = {
+        product.id: product
+        for product in eager_load_products(Product.query)
+        .filter(Product.id.in_(upserted_ids))
+        .all()
+    }
+    return {
+        "since": since,
+        "next": changes[-1].id if changes else since,
+        "has_more": has_more,
+        # Products deleted after this page show up as tombstones on a later one
+        "upserted": [products[id] for id in upserted_ids if id in products],
+        "deleted": [
+            change.product_uuid for change in latest.values() if change.deleted
+        ],
+    }
+
+
+def load_related_products(uuid, limit):
+    """Products most often bought together with a product, best first"""
+    source = select(Product.id).where(Product.uuid == uuid).scalar_subquery()
+    return (
+        eager_load_products(Product.query)
+        .join(RelatedProduct, RelatedProduct.related_id == Product.id)
+        .filter(RelatedProduct.product_id == source)
+        .order_by(RelatedProduct.rank)
+        .limit(limit)
+        .all()
+    )
+
+
 def validate_product_data(args):
     """Validate product data"""
     errors = []
@@ -149,7 +264,7 @@ class ProductsResource(Resource):
                 )
 
             # Check if category exists
-            category = Category.query.filter_by(uuid=args["category_id"]).first()
+            category = category_cache.get(args["category_id"])
             if not category:
                 product_ns.abort(404, "Category not found")
 
@@ -191,27 +306,158 @@ class ProductsResource(Resource):
             db.session.rollback()
             product_ns.abort(500, f"Error creating product: {str(e)}")
 
-    @product_ns.marshal_list_with(product_model)
+    @cache_response
+    @serialize_with(product_model, as_list=True)
     @product_ns.doc("get_all_products")
     def get(self):
         """Get all products"""
         try:
-            products = Product.query.all()
+            products = eager_load_products(Product.query).all()
             return products, 200
         except Exception as e:
             product_ns.abort(500, f"Error fetching products: {str(e)}")
 
 
+@product_ns.route("/changes")
+class ProductChangesResource(Resource):
+    """Resource for syncing the catalog incrementally"""
+
+    @cache_response
+    @serialize_with(product_changes_model)
+    @product_ns.doc(
+        "get_product_changes",
+        params={
+            "since": "Change token from a previous response, "
+            "omit it to get the current token",
+            "limit": "Most changes to return",
+        },
+    )
+    def get(self):
+        """Get products created, updated or deleted after a change token"""
+        page_size = current_app.config["CHANGE_FEED_PAGE_SIZE"]
+        since = request.args.get("since", type=int)
+        limit = request.args.get("limit", page_size, type=int)
+        if since is None and "since" in request.args:
+            product_ns.abort(400, "since must be a change token")
+
+        if since is None:
+            # New clients take the current token, then pull the catalog once
+            latest = db.session.query(db.func.max(ProductChange.id)).scalar() or 0
+            return {
+                "since": latest,
+                "next": latest,
+                "has_more": False,
+                "upserted": [],
+                "deleted": [],
+            }, 200
+        return load_product_changes(since, min(max(limit, 1), page_size)), 200
+
+
+@product_ns.route("/stream")
+class ProductStreamResource(Resource):
+    """Resource for following live stock and prices"""
+
+    @product_ns.doc(
+        "stream_products",
+        params={
+            "products": "Comma separated product UUIDs",
+            "categories": "Comma separated category UUIDs",
+        },
+        responses={200: "text/event-stream of snapshot and update events"},
+    )
+    # Streams stay open for minutes, they would starve everything else of slots
+    @admission_priority(None)
+    @request_deadline(None)
+    def get(self):
+        """Stream stock, price and flash sale changes as Server-Sent Events"""
+        product_uuids = [
+            uuid.strip()
+            for value in request.args.getlist("products")
+            for uuid in value.split(",")
+            if uuid.strip()
+        ]
+        category_uuids = [
+            uuid.strip()
+            for value in request.args.getlist("categories")
+            for uuid in value.split(",")
+            if uuid.strip()
+        ]
+        limit = current_app.config["PRODUCT_BATCH_MAX"]
+        if len(product_uuids) + len(category_uuids) > limit:
+            product_ns.abort(400, f"At most {limit} subscriptions per stream")
+
+        product_ids = []
+        if product_uuids:
+            product_ids = [
+                id
+                for (id,) in db.session.query(Product.id).filter(
+                    Product.uuid.in_(product_uuids)
+                )
+            ]
+        categories = [category_cache.get(uuid) for uuid in category_uuids]
+        category_ids = [category.id for category in categories if category]
+        if not product_ids and not category_ids:
+            product_ns.abort(400, "Subscribe to at least one product or category")
+
+        subscription = product_broadcaster.subscribe(product_ids, category_ids)
+        token, snapshot = product_broadcaster.snapshot(subscription)
+        dumps = current_app.json.dumps
+
+        def events():
+            yield f"retry: 3000\nid: {token}\nevent: snapshot\ndata: {dumps(snapshot)}\n\n"
+            yield from product_broadcaster.stream(subscription, dumps)
+
+        return Response(
+            events(),
+            mimetype="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache, no-transform",
+                "X-Accel-Buffering": "no",
+            },
+        )
+
+
+@product_ns.route("/batch")
+class ProductBatchResource(Resource):
+    """Resource for loading many products in one request"""
+
+    @cache_response
+    @serialize_with(product_batch_model)
+    @product_ns.doc(
+        "get_product_batch", params={"uuids": "Comma separated product UUIDs"}
+    )
+    def get(self):
+        """Get several products by UUID, in the requested order"""
+        uuids = [
+            uuid for value in request.args.getlist("uuids") for uuid in value.split(",")
+        ]
+        return load_product_batch(uuids), 200
+
+    @read_only
+    @product_ns.expect(product_batch_request_model)
+    @serialize_with(product_batch_model)
+    @product_ns.doc("post_product_batch")
+    def post(self):
+        """Get several products by UUID, for lists too long for a query string"""
+        uuids = (request.get_json(silent=True) or {}).get("uuids")
+        if not isinstance(uuids, list) or not all(
+            isinstance(uuid, str) for uuid in uuids
+        ):
+            product_ns.abort(400, "uuids must be a list of strings")
+        return load_product_batch(uuids), 200
+
+
 @product_ns.route("/<string:uuid>")
 class SingleProductResource(Resource):
     """Resource for managing individual products"""
 
-    @product_ns.marshal_with(product_model)
+    @cache_response
+    @serialize_with(product_model)
     @product_ns.doc("get_product")
     def get(self, uuid):
         """Get a specific product by UUID"""
         try:
-            product = Product.query.filter_by(uuid=uuid).first()
+            product = eager_load_products(Product.query).filter_by(uuid=uuid).first()
             if not product:
                 product_ns.abort(404, "Product not found")
             return product, 200
@@ -264,7 +510,7 @@ class SingleProductResource(Resource):
                 product.flash_sale = args["flash_sale"]
 
             if args.get("category_id"):
-                category = Category.query.filter_by(uuid=args["category_id"]).first()
+                category = category_cache.get(args["category_id"])
                 if not category:
                     product_ns.abort(404, "Category not found")
                 product.category_id = category.id
@@ -285,13 +531,8 @@ class SingleProductResource(Resource):
             if not product:
                 product_ns.abort(404, "Product not found")
 
-            # Delete associated images from filesystem
-            for image in product.images:
-                delete_file(image.image_url)
-
-            # Delete product (cascade should handle images in DB)
-            db.session.delete(product)
-            db.session.commit()
+            # Delete product, image rows cascade and their files go after commit
+            product.delete()
 
             return {"message": "Product deleted successfully"}, 200
 
@@ -300,20 +541,48 @@ class SingleProductResource(Resource):
             product_ns.abort(500, f"Error deleting product: {str(e)}")
 
 
+@product_ns.route("/<string:uuid>/related")
+class RelatedProductsResource(Resource):
+    """Resource for products frequently bought together"""
+
+    @cache_response
+    @serialize_with(product_model, as_list=True)
+    @product_ns.doc(
+        "get_related_products",
+        params={"limit": "Number of products, at most RELATED_PRODUCTS_TOP_K"},
+    )
+    def get(self, uuid):
+        """Get the products most often ordered by buyers of a product"""
+        top_k = current_app.config["RELATED_PRODUCTS_TOP_K"]
+        limit = request.args.get("limit", top_k, type=int)
+        products = load_related_products(uuid, max(1, min(limit, top_k)))
+        if (
+            not products
+            and not db.session.query(Product.id).filter_by(uuid=uuid).first()
+        ):
+            product_ns.abort(404, "Product not found")
+        return products, 200
+
+
 @product_ns.route("/category/<string:category_uuid>")
 class ProductsByCategoryResource(Resource):
     """Resource for getting products by category"""
 
-    @product_ns.marshal_list_with(product_model)
+    @cache_response
+    @serialize_with(product_model, as_list=True)
     @product_ns.doc("get_products_by_category")
     def get(self, category_uuid):
         """Get all products in a specific category"""
         try:
-            category = Category.query.filter_by(uuid=category_uuid).first()
+            category = category_cache.get(category_uuid)
             if not category:
                 product_ns.abort(404, "Category not found")
 
-            products = Product.query.filter_by(category_id=category.id).all()
+            products = (
+                eager_load_products(Product.query)
+                .filter_by(category_id=category.id)
+                .all()
+            )
             return products, 200
 
         except Exception as e:
@@ -324,12 +593,15 @@ class ProductsByCategoryResource(Resource):
 class FlashSaleProductsResource(Resource):
     """Resource for getting flash sale products"""
 
-    @product_ns.marshal_list_with(product_model)
+    @cache_response
+    @serialize_with(product_model, as_list=True)
     @product_ns.doc("get_flash_sale_products")
     def get(self):
         """Get all products on flash sale"""
         try:
-            products = Product.query.filter_by(flash_sale=True).all()
+            products = (
+                eager_load_products(Product.query).filter_by(flash_sale=True).all()
+            )
             return products, 200
         except Exception as e:
             product_ns.abort(500, f"Error fetching flash sale products: {str(e)}")
@@ -0,0 +1,106 @@
+"""
+Concurrent read/write throughput on SQLite with and without the production
+engine profile (WAL, synchronous=NORMAL, mmap, cache size and busy timeout).
+
+Usage: python -m benchmarks.bench_db_concurrency [seconds] [readers] [writers]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import make_app, report
+from sqlalchemy.exc import OperationalError
+
+from config import Config, engine_options, ProdConfig
+from exts import db
+from models import Category, Product
+
+
+def run(app, seconds, readers, writers):
+    with app.app_context():
+        db.create_all()
+        category = Category(name="bench")
+        category.save()
+        category_id = category.id
+
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def reader():
+        with app.app_context():
+            while time.monotonic() < deadline:
+                try:
+                    Product.query.filter_by(category_id=category_id).limit(20).all()
+                    db.session.rollback()
+                    key = "reads"
+                except OperationalError:
+                    db.session.rollback()
+                    key = "locked"
+                with lock:
+                    counts[key] += 1
+
+    def writer(n):
+        with app.app_context():
+            i = 0
+            while time.monotonic() < deadline:
+                i += 1
+                try:
+                    Product(
+                        product_name=f"product {n}-{i}",
+                        current_price=9.99,
+                        in_stock=10,
+                        category_id=category_id,
+                    ).save()
+                    key = "writes"
+                except OperationalError:
+                    db.session.rollback()
+                    key = "locked"
+                with lock:
+                    counts[key] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        db.engine.dispose()
+
+    return (
+        f"{counts['reads'] / seconds:8,.0f} reads/s  "
+        f"{counts['writes'] / seconds:6,.0f} writes/s  "
+        f"{counts['locked']} locked errors"
+    )
+
+
+def main(seconds=5, readers=8, writers=4):
+    with tempfile.TemporaryDirectory() as tmp:
+        default_uri = "sqlite:///" + os.path.join(tmp, "default.db")
+        tuned_uri = "sqlite:///" + os.path.join(tmp, "tuned.db")
+
+        default_app = make_app(
+            Config,
+            SQLALCHEMY_DATABASE_URI=default_uri,
+            OPENAPI_LAZY=True,
+        )
+        tuned_app = make_app(
+            ProdConfig,
+            SQLALCHEMY_DATABASE_URI=tuned_uri,
+            SQLALCHEMY_ENGINE_OPTIONS=engine_options(tuned_uri),
+        )
+
+        rows = [
+            ("default engine", run(default_app, seconds, readers, writers)),
+            ("production profile", run(tuned_app, seconds, readers, writers)),
+        ]
+    report(f"{readers} readers / {writers} writers for {seconds}s on SQLite", rows)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
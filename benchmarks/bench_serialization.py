@@ -0,0 +1,85 @@
+"""
+Compare flask-restx marshalling against the precompiled serializers.
+
+Usage: python -m benchmarks.bench_serialization [count]
+"""
+
+import json
+import sys
+import uuid
+from types import SimpleNamespace
+
+from benchmarks.common import report, timeit
+from flask_restx import marshal
+
+from api.product_ns import product_model
+from utilities.serializers import compile_model
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_products(count):
+    """Build product-like objects with a category and a few images"""
+    categories = [
+        SimpleNamespace(uuid=str(uuid.uuid4()), name=f"category {i}") for i in range(20)
+    ]
+    products = []
+    for i in range(count):
+        images = [
+            SimpleNamespace(
+                uuid=str(uuid.uuid4()), image_url=f"/media/{i}-{j}.jpg", product_id=i
+            )
+            for j in range(3)
+        ]
+        products.append(
+            SimpleNamespace(
+                uuid=str(uuid.uuid4()),
+                product_name=f"Product {i}",
+                description="A long enough product description " * 3,
+                current_price=19.99 + i,
+                previous_price=24.99 + i,
+                in_stock=i % 50,
+                flash_sale=i % 7 == 0,
+                category=categories[i % len(categories)],
+                images=images,
+            )
+        )
+    return products
+
+
+def main(count=10000):
+    products = make_products(count)
+    serializer = compile_model(product_model)
+
+    marshalled = marshal(products, product_model)
+    compiled = [serializer(product) for product in products]
+    assert json.loads(json.dumps(marshalled)) == compiled
+
+    marshal_time = timeit(lambda: marshal(products, product_model))
+    compiled_time = timeit(lambda: [serializer(product) for product in products])
+    rows = [
+        ("flask-restx marshal", f"{count / marshal_time:,.0f} products/s"),
+        ("compiled serializer", f"{count / compiled_time:,.0f} products/s"),
+        ("speedup", f"{marshal_time / compiled_time:.1f}x"),
+    ]
+
+    json_time = timeit(lambda: json.dumps(compiled))
+    rows.append(("stdlib json.dumps", f"{count / json_time:,.0f} products/s"))
+    if orjson is not None:
+        orjson_time = timeit(lambda: orjson.dumps(compiled))
+        rows.append(("orjson.dumps", f"{count / orjson_time:,.0f} products/s"))
+
+    end_to_end = timeit(lambda: json.dumps(marshal(products, product_model)))
+    fast = orjson.dumps if orjson is not None else json.dumps
+    fast_end_to_end = timeit(lambda: fast([serializer(p) for p in products]))
+    rows.append(("marshal + json", f"{count / end_to_end:,.0f} products/s"))
+    rows.append(("compiled + fast json", f"{count / fast_end_to_end:,.0f} products/s"))
+
+    report(f"Serializing {count:,} products", rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,97 @@
+"""
+Cache stampede on one product: concurrent GETs right after a write cleared the
+response cache, with and without coalescing of identical misses.
+
+Usage: python -m benchmarks.bench_stampede [rounds] [clients]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import make_app, report
+from sqlalchemy import event
+
+from config import ProdConfig, engine_options
+from exts import db
+from models import Category, Product
+from utilities import compression
+
+
+def run(coalesce, rounds, clients, tmp):
+    uri = "sqlite:///" + os.path.join(tmp, f"stampede-{coalesce}.db")
+    app = make_app(
+        ProdConfig,
+        SQLALCHEMY_DATABASE_URI=uri,
+        SQLALCHEMY_ENGINE_OPTIONS=engine_options(uri),
+        COMPRESS_CACHE_COALESCE_TIMEOUT=5 if coalesce else 0,
+    )
+
+    statements = []
+    with app.app_context():
+        db.create_all()
+        category = Category(name="stampede")
+        category.save()
+        product = Product(
+            product_name="flash sale item",
+            description="x" * 500,
+            current_price=9.99,
+            in_stock=100,
+            category_id=category.id,
+        )
+        product.save()
+        path = f"/api/product/{product.uuid}"
+        event.listen(
+            db.engine, "before_cursor_execute", lambda *args: statements.append(1)
+        )
+
+    latencies = []
+    lock = threading.Lock()
+
+    def client(barrier):
+        http = app.test_client()
+        barrier.wait()
+        start = time.perf_counter()
+        response = http.get(path)
+        elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, response.data
+        with lock:
+            latencies.append(elapsed)
+
+    for _ in range(rounds):
+        # What a product update does to every cached response
+        compression.cache.clear()
+        barrier = threading.Barrier(clients)
+        threads = [
+            threading.Thread(target=client, args=(barrier,)) for _ in range(clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    with app.app_context():
+        db.engine.dispose()
+
+    latencies.sort()
+    return (
+        f"{len(statements) / rounds:6.1f} statements/stampede  "
+        f"p50 {statistics.median(latencies):7.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:7.2f} ms"
+    )
+
+
+def main(rounds=20, clients=32):
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [
+            ("every miss runs the view", run(False, rounds, clients, tmp)),
+            ("identical misses coalesced", run(True, rounds, clients, tmp)),
+        ]
+    report(f"{clients} concurrent GETs of one product after a write", rows)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,44 @@
+"""
+Measure cold start to first response in fresh interpreters.
+
+Compares building the OpenAPI spec eagerly at startup with the lazy production
+mode, and reports the first /swagger.json hit in both.
+
+Usage: python -m benchmarks.bench_startup [runs]
+"""
+
+import statistics
+import sys
+
+from benchmarks.common import report
+from utilities.startup_profile import profile_startup
+
+
+def measure(runs, path, env):
+    totals, factories, firsts = [], [], []
+    for _ in range(runs):
+        timings = profile_startup("ProdConfig", path, env=env)
+        totals.append(timings["total_s"] * 1000)
+        factories.append(timings["create_app_s"] * 1000)
+        firsts.append(timings["first_response_s"] * 1000)
+    return (
+        f"total {statistics.median(totals):7.1f} ms  "
+        f"create_app {statistics.median(factories):6.1f} ms  "
+        f"first response {statistics.median(firsts):6.1f} ms"
+    )
+
+
+def main(runs=5):
+    eager = {"OPENAPI_LAZY": "false", "API_DOCS_URL": "/docs"}
+    lazy = {"OPENAPI_LAZY": "true", "API_DOCS_URL": ""}
+    rows = [
+        ("eager spec, GET /welcome", measure(runs, "/welcome", eager)),
+        ("lazy spec, GET /welcome", measure(runs, "/welcome", lazy)),
+        ("eager spec, GET /swagger.json", measure(runs, "/swagger.json", eager)),
+        ("lazy spec, GET /swagger.json", measure(runs, "/swagger.json", lazy)),
+    ]
+    report(f"Cold start to first response (median of {runs} runs)", rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,75 @@
+"""
+Multi-row write endpoint with a commit per save versus one commit per request.
+
+Usage: python -m benchmarks.bench_unit_of_work [requests] [rows_per_request]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.common import make_app, report
+from flask import request
+from sqlalchemy import event
+
+from config import ProdConfig, engine_options
+from exts import db
+from models import Category, Product
+
+
+def run(unit_of_work, requests, rows, tmp):
+    uri = "sqlite:///" + os.path.join(tmp, f"uow-{unit_of_work}.db")
+    app = make_app(
+        ProdConfig,
+        SQLALCHEMY_DATABASE_URI=uri,
+        SQLALCHEMY_ENGINE_OPTIONS=engine_options(uri),
+        DB_UNIT_OF_WORK=unit_of_work,
+    )
+
+    def bulk_create():
+        category = Category(name=f"bulk {request.args['batch']}")
+        category.save()
+        for i in range(int(request.args["rows"])):
+            Product(
+                product_name=f"product {i}",
+                current_price=9.99,
+                in_stock=5,
+                category_id=category.id,
+            ).save()
+        return {"created": rows}, 201
+
+    app.add_url_rule("/bench/bulk", view_func=bulk_create, methods=["POST"])
+
+    commits = []
+    with app.app_context():
+        db.create_all()
+        event.listen(db.engine, "commit", lambda conn: commits.append(1))
+
+    client = app.test_client()
+    latencies = []
+    for batch in range(requests):
+        start = time.perf_counter()
+        response = client.post(f"/bench/bulk?batch={batch}&rows={rows}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 201, response.data
+
+    return (
+        f"{len(commits) / requests:5.1f} commits/request  "
+        f"p50 {statistics.median(latencies):7.2f} ms  "
+        f"p95 {statistics.quantiles(latencies, n=20)[-1]:7.2f} ms"
+    )
+
+
+def main(requests=50, rows=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        rows_out = [
+            ("commit per save", run(False, requests, rows, tmp)),
+            ("unit of work", run(True, requests, rows, tmp)),
+        ]
+    report(f"{requests} requests writing {rows + 1} rows each", rows_out)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
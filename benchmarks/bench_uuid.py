@@ -0,0 +1,96 @@
+"""
+Index size and lookup latency of product uuids stored as 36 character text,
+then again after flask migrate-uuids converted them to 16 byte blobs.
+
+Usage: python -m benchmarks.bench_uuid [products] [lookups]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import insert, text
+
+from benchmarks.common import make_app, report
+
+from config import TestConfig
+from exts import db
+from models import Category
+from utilities.uuid_migration import migrate_uuids
+
+LOOKUP = "SELECT id FROM product WHERE uuid = ?"
+
+
+def index_size():
+    """Bytes used by the unique index on product.uuid"""
+    name = db.session.execute(
+        text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'product' AND sql IS NULL"
+        )
+    ).scalar()
+    return db.session.execute(
+        text("SELECT sum(pgsize) FROM dbstat WHERE name = :name"), {"name": name}
+    ).scalar()
+
+
+def lookup_latency(values):
+    """Median seconds of a single product lookup by uuid, on the raw driver"""
+    cursor = db.session.connection().connection.driver_connection.cursor()
+    timings = []
+    for value in values:
+        start = time.perf_counter()
+        cursor.execute(LOOKUP, (value,)).fetchone()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def measure(label, values):
+    db.session.commit()
+    db.session.execute(text("VACUUM"))
+    return [
+        (f"{label} index size", f"{index_size() / 1024:,.0f} KiB"),
+        (f"{label} lookup p50", f"{lookup_latency(values) * 1e6:.1f} us"),
+    ]
+
+
+def main(products=200000, lookups=20000):
+    path = os.path.join(tempfile.mkdtemp(), "uuid.db")
+    app = make_app(TestConfig, SQLALCHEMY_DATABASE_URI="sqlite:///" + path)
+    rng = random.Random(1234)
+    uuids = [
+        str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(products)
+    ]
+    sample = rng.sample(uuids, min(lookups, products))
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Category), [{"name": "bench"}])
+
+        # Rows as the String(36) column stored them
+        db.session.execute(
+            text(
+                "INSERT INTO product (uuid, product_name, current_price, in_stock, "
+                "category_id) VALUES (:uuid, 'product', 1.0, 1, 1)"
+            ),
+            [{"uuid": value} for value in uuids],
+        )
+        rows = measure("text  ", sample)
+
+        start = time.perf_counter()
+        migrate_uuids(batch_size=5000)
+        elapsed = time.perf_counter() - start
+        rows.append(("migration", f"{products:,} rows in {elapsed:.2f}s"))
+
+        rows += measure("binary", [uuid.UUID(value).bytes for value in sample])
+
+    report(f"Product uuid storage ({products:,} rows)", rows)
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,32 @@
+import os
+import time
+
+os.environ.setdefault("MAIL_USE_TLS", "false")
+os.environ.setdefault("MAIL_USE_SSL", "false")
+
+
+def timeit(func, repeat=5):
+    """Run a callable several times and return the best wall time in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(title, rows):
+    """Print a small aligned results table"""
+    print(f"\n{title}")
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f"  {label.ljust(width)}  {value}")
+
+
+def make_app(config, **overrides):
+    """Build the app from a config class with some settings overridden"""
+    from main import create_app
+
+    settings = type("BenchConfig", (config,), overrides)
+    return create_app(settings)
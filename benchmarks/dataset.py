@@ -0,0 +1,55 @@
+"""
+Deterministic benchmark dataset.
+
+Rows come from the ``flask seed`` generator, so two runs with the same seed
+produce identical databases.
+"""
+
+import random
+
+from sqlalchemy import func
+
+from exts import db
+from models import Category, Product, ProductImage, User
+from utilities.seed import seed_database
+
+BATCH_SIZE = 10000
+BENCH_PASSWORD = "benchmark-password"
+
+
+def seed(products=100000, images=500000, users=50000, categories=50, seed=1234):
+    """Fill an empty database, must run inside an app context"""
+    seed_database(
+        {
+            "categories": categories,
+            "products": products,
+            "images": images,
+            "users": users,
+        },
+        seed=seed,
+        batch_size=BATCH_SIZE,
+        password=BENCH_PASSWORD,
+    )
+
+
+def is_seeded(products):
+    """Check if the database already holds a dataset of this size"""
+    return db.session.query(func.count(Product.id)).scalar() == products
+
+
+def sample(seed=1234, size=500):
+    """Pick the uuids the load generator requests, the same ones every run"""
+    rng = random.Random(seed)
+
+    def pick(model, column):
+        total = db.session.query(func.max(model.id)).scalar() or 0
+        ids = rng.sample(range(1, total + 1), min(size, total))
+        rows = dict(db.session.query(model.id, column).filter(model.id.in_(ids)))
+        return [rows[i] for i in ids if i in rows]
+
+    return {
+        "products": pick(Product, Product.uuid),
+        "categories": pick(Category, Category.uuid),
+        "images": pick(ProductImage, ProductImage.uuid),
+        "users": pick(User, User.email),
+    }
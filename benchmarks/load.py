@@ -0,0 +1,364 @@
+"""
+Load test every namespace against a seeded database.
+
+The app is built with create_app(TestConfig), served by a threaded HTTP server
+in a child process and driven by keep-alive client threads. Each endpoint is
+measured on its own and the results are written as JSON.
+
+Usage:
+    python -m benchmarks.load run [--products 100000] [--duration 10]
+        [--concurrency 8] [--output results.json] [--only products.single]
+    python -m benchmarks.load compare baseline.json candidate.json [--threshold 10]
+"""
+
+import argparse
+import gzip
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import make_app
+
+from config import TestConfig
+
+DEFAULT_DATABASE = os.path.join(tempfile.gettempdir(), "mimi-bench.db")
+
+
+def build_app(args):
+    uri = "sqlite:///" + args.database
+    overrides = {"SQLALCHEMY_DATABASE_URI": uri, "DEBUG": False}
+    if args.no_cache:
+        overrides["COMPRESS_CACHE_TTL"] = 0
+    return make_app(TestConfig, **overrides)
+
+
+def prepare(args):
+    """Seed the database once and pick the ids to request"""
+    from benchmarks import dataset
+    from exts import db
+
+    app = build_app(args)
+    with app.app_context():
+        db.create_all()
+        if not dataset.is_seeded(args.products):
+            if args.reseed or db.session.query(dataset.Product.id).first():
+                db.drop_all()
+                db.create_all()
+            print(f"Seeding {args.products:,} products into {args.database} ...")
+            dataset.seed(
+                products=args.products,
+                images=args.products * 5,
+                users=args.products // 2,
+                categories=50,
+                seed=args.seed,
+            )
+        return dataset.sample(seed=args.seed)
+
+
+def serve(args, port, ready):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class Handler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(
+        "127.0.0.1", port, build_app(args), threaded=True, request_handler=Handler
+    )
+    ready.set()
+    server.serve_forever()
+
+
+def scenarios(ids, token):
+    """Endpoint name -> function returning (method, path, body, headers)"""
+
+    def choice(key):
+        values = ids[key]
+        return lambda rng: rng.choice(values)
+
+    product, category, image, user = (
+        choice("products"),
+        choice("categories"),
+        choice("images"),
+        choice("users"),
+    )
+    from benchmarks.dataset import BENCH_PASSWORD
+
+    def login(rng):
+        body = {"email": user(rng), "password": BENCH_PASSWORD}
+        return "POST", "/api/auth/login", body, {}
+
+    return {
+        "auth.login": login,
+        "auth.profile": lambda rng: (
+            "GET",
+            "/api/auth/profile",
+            None,
+            {"Authorization": f"Bearer {token}"},
+        ),
+        "products.list": lambda rng: ("GET", "/api/product/", None, {}),
+        "products.list_flash_sale": lambda rng: (
+            "GET",
+            "/api/product/flash-sale",
+            None,
+            {},
+        ),
+        "products.single": lambda rng: (
+            "GET",
+            f"/api/product/{product(rng)}",
+            None,
+            {},
+        ),
+        "products.batch": lambda rng: (
+            "GET",
+            "/api/product/batch?uuids=" + ",".join(product(rng) for _ in range(20)),
+            None,
+            {},
+        ),
+        "products.by_category": lambda rng: (
+            "GET",
+            f"/api/product/category/{category(rng)}",
+            None,
+            {},
+        ),
+        "categories.list": lambda rng: ("GET", "/api/categories/", None, {}),
+        "categories.single": lambda rng: (
+            "GET",
+            f"/api/categories/{category(rng)}",
+            None,
+            {},
+        ),
+        "categories.products": lambda rng: (
+            "GET",
+            f"/api/categories/{category(rng)}/products?page={rng.randint(1, 20)}",
+            None,
+            {},
+        ),
+        "images.single": lambda rng: (
+            "GET",
+            f"/api/images/image/{image(rng)}",
+            None,
+            {},
+        ),
+    }
+
+
+def request(conn, method, path, body, headers):
+    payload = None
+    headers = dict(headers, **{"Accept-Encoding": "gzip"})
+    if body is not None:
+        payload = json.dumps(body)
+        headers["Content-Type"] = "application/json"
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    if response.getheader("Content-Encoding") == "gzip":
+        data = gzip.decompress(data)
+    return response.status, data
+
+
+def login_token(port, ids):
+    from benchmarks.dataset import BENCH_PASSWORD
+
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    body = {"email": ids["users"][0], "password": BENCH_PASSWORD}
+    status, data = request(conn, "POST", "/api/auth/login", body, {})
+    conn.close()
+    return json.loads(data)["data"]["access_token"] if status == 200 else None
+
+
+def drive(port, scenario, duration, concurrency, seed):
+    """Hit one endpoint from several threads and collect latencies"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(n):
+        rng = random.Random(seed + n)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            method, path, body, headers = scenario(rng)
+            start = time.perf_counter()
+            try:
+                status, _ = request(conn, method, path, body, headers)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                status = 0
+            local.append(time.perf_counter() - start)
+            if status >= 400 or status == 0:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if len(latencies) < 2:
+        latencies = latencies * 2 or [0.0, 0.0]
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def run(args):
+    ids = prepare(args)
+    port = free_port()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args, port, ready))
+    server.start()
+    ready.wait(60)
+    time.sleep(0.2)
+
+    try:
+        selected = scenarios(ids, login_token(port, ids))
+        if args.only:
+            selected = {name: selected[name] for name in args.only}
+        else:
+            # Listing the whole catalog is too slow to run by default
+            selected.pop("products.list")
+
+        results = {}
+        for name, scenario in selected.items():
+            results[name] = drive(
+                port, scenario, args.duration, args.concurrency, args.seed
+            )
+            stats = results[name]
+            print(
+                f"{name:28} {stats['rps']:9.1f} req/s  p50 {stats['p50_ms']:8.2f} ms"
+                f"  p95 {stats['p95_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms"
+                f"  errors {stats['errors']}"
+            )
+    finally:
+        server.terminate()
+        server.join()
+
+    output = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "products": args.products,
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "cache": not args.no_cache,
+        },
+        "endpoints": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"Results written to {args.output}")
+    return output
+
+
+def compare(args):
+    """Diff two result files and flag regressions beyond the threshold"""
+    with open(args.baseline) as f:
+        baseline = json.load(f)["endpoints"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["endpoints"]
+
+    regressions = []
+    for name in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[name], candidate[name]
+        rps_change = (new["rps"] - old["rps"]) / old["rps"] * 100 if old["rps"] else 0
+        p95_change = (
+            (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            if old["p95_ms"]
+            else 0
+        )
+        regressed = rps_change < -args.threshold or p95_change > args.threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:28} rps {old['rps']:9.1f} -> {new['rps']:9.1f} ({rps_change:+6.1f}%)"
+            f"  p95 {old['p95_ms']:8.2f} -> {new['p95_ms']:8.2f} ms ({p95_change:+6.1f}%)"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+
+    for name in sorted(set(baseline) ^ set(candidate)):
+        print(f"{name:28} only in {'baseline' if name in baseline else 'candidate'}")
+
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the load test")
+    run_parser.add_argument("--database", default=DEFAULT_DATABASE)
+    run_parser.add_argument("--products", type=int, default=100000)
+    run_parser.add_argument("--duration", type=float, default=10)
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--seed", type=int, default=1234)
+    run_parser.add_argument("--output")
+    run_parser.add_argument("--only", nargs="+", help="Endpoints to measure")
+    run_parser.add_argument("--reseed", action="store_true")
+    run_parser.add_argument(
+        "--no-cache", action="store_true", help="Disable the response cache"
+    )
+
+    compare_parser = commands.add_parser("compare", help="Diff two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=10, help="Allowed change in percent"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args)
+        return 0
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
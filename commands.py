@@ -0,0 +1,134 @@
+import click
+from flask import current_app
+
+
+def register_commands(app):
+    """Register the application's CLI commands"""
+
+    @app.cli.command("profile-startup")
+    @click.option("--config", "config_name", default="ProdConfig", help="Config class")
+    @click.option("--path", default="/welcome", help="Path for the first request")
+    @click.option("--top", default=15, help="Number of imports to list")
+    def profile_startup_command(config_name, path, top):
+        """Report import, app factory and first request costs of a cold start"""
+        from utilities.startup_profile import format_profile, profile_startup
+
+        click.echo(format_profile(profile_startup(config_name, path), top=top))
+
+    @app.cli.command("openapi-export")
+    @click.argument("path", default="openapi.json")
+    def openapi_export_command(path):
+        """Write the serialized OpenAPI spec, served when OPENAPI_SPEC_PATH is set"""
+        from utilities.openapi import export_spec
+
+        size = export_spec(current_app.extensions["api"], current_app, path)
+        click.echo(f"Wrote {size} bytes to {path}")
+
+    @app.cli.command("seed")
+    @click.option("--categories", default=50, help="Number of categories")
+    @click.option("--products", default=100000, help="Number of products")
+    @click.option("--images", default=300000, help="Number of product images")
+    @click.option("--users", default=50000, help="Number of users")
+    @click.option("--carts", default=100000, help="Number of cart items")
+    @click.option("--orders", default=500000, help="Number of orders")
+    @click.option("--seed", "seed", default=1234, help="Random seed")
+    @click.option("--batch-size", default=20000, help="Rows per INSERT transaction")
+    @click.option("--workers", type=int, help="Generator processes [default: CPUs]")
+    @click.option("--password", default="seed-password", help="Password of every user")
+    @click.option("--reset", is_flag=True, help="Drop and recreate all tables first")
+    def seed_command(seed, batch_size, workers, password, reset, **counts):
+        """Fill an empty database with deterministic, skewed synthetic data"""
+        import time
+
+        from exts import db
+        from utilities.seed import is_empty, seed_database
+
+        if reset:
+            db.drop_all()
+        db.create_all()
+        if not is_empty():
+            raise click.ClickException("Database is not empty, use --reset")
+
+        def progress(name, done, total):
+            if done == total or done % (batch_size * 10) == 0:
+                click.echo(f"  {name:10} {done:>12,} / {total:,}")
+
+        start = time.perf_counter()
+        try:
+            inserted = seed_database(
+                counts,
+                seed=seed,
+                batch_size=batch_size,
+                workers=workers,
+                password=password,
+                progress=progress,
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        elapsed = time.perf_counter() - start
+        total = sum(inserted.values())
+        click.echo(
+            f"Inserted {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)"
+        )
+
+        if inserted["orders"]:
+            # Bulk inserted orders skip the session hooks keeping these current
+            from utilities.sales_rollup import rebuild_sales_rollups
+
+            rows = rebuild_sales_rollups(workers=workers)
+            click.echo(f"Rebuilt sales rollups, {rows:,} product rows")
+            click.echo("Run flask related-products next to index the seeded orders")
+
+    @app.cli.command("migrate-uuids")
+    @click.option("--batch-size", default=5000, help="Rows converted per transaction")
+    @click.option("--pause", default=0.0, help="Seconds to sleep between batches")
+    def migrate_uuids_command(batch_size, pause):
+        """Convert text uuid columns to binary storage in small batches"""
+        from utilities.uuid_migration import migrate_uuids
+
+        def progress(table, converted):
+            if converted % (batch_size * 20) == 0:
+                click.echo(f"  {table:15} {converted:>12,}")
+
+        try:
+            converted = migrate_uuids(batch_size, pause, progress)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        for table, count in converted.items():
+            click.echo(f"{table:15} {count:>12,} rows converted")
+
+    @app.cli.command("rebuild-sales")
+    @click.option("--batch-size", default=100000, help="Orders per chunk")
+    @click.option("--workers", type=int, help="Parallel chunks [default: 4]")
+    def rebuild_sales_command(batch_size, workers):
+        """Recompute the daily sales rollups from every order"""
+        from utilities.sales_rollup import rebuild_sales_rollups
+
+        def progress(done, total):
+            click.echo(f"  orders {done:>12,} / {total:,}")
+
+        rows = rebuild_sales_rollups(batch_size, workers, progress)
+        click.echo(f"Folded {rows:,} grouped rows into the rollups")
+
+    @app.cli.command("related-products")
+    @click.option("--full", is_flag=True, help="Rebuild from every order")
+    @click.option("--batch-size", default=50000, help="Orders read per transaction")
+    @click.option("--top-k", type=int, help="Neighbors kept per product")
+    def related_products_command(full, batch_size, top_k):
+        """Fold new orders into the frequently bought together index"""
+        from utilities.recommendations import refresh_related_products
+
+        def progress(stage, done, total):
+            click.echo(f"  {stage:10} {done:>12,} / {total:,}")
+
+        result = refresh_related_products(
+            full=full,
+            batch_size=batch_size,
+            top_k=top_k or current_app.config["RELATED_PRODUCTS_TOP_K"],
+            settle=current_app.config["RELATED_PRODUCTS_SETTLE_SECONDS"],
+            progress=progress,
+        )
+        click.echo(
+            f"Indexed orders up to {result['last_order']:,}: "
+            f"{result['pairs']:,} pairs updated, {result['products']:,} products ranked"
+        )
@@ -1,11 +1,28 @@
 import os
 from datetime import timedelta
-from dotenv import load_dotenv
 
-load_dotenv()
 BASE_DIR = os.path.dirname(os.path.realpath(__file__))
 
 
+def engine_options(database_uri):
+    """Production SQLAlchemy engine options for the given database backend"""
+    if database_uri.startswith("sqlite"):
+        # The sqlite3 driver waits this long on a locked database before failing
+        return {
+            "connect_args": {
+                "timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)) / 1000
+            }
+        }
+
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
 class Config:
     """Defines a base class configurations"""
 
@@ -21,23 +38,123 @@ class Config:
         os.environ.get("SQLALCHEMY_TRACK_MODIFICATIONS")
     )
 
+    # Match text uuids too while flask migrate-uuids converts existing rows
+    UUID_LEGACY_LOOKUPS = (
+        os.environ.get("UUID_LEGACY_LOOKUPS", "false").lower() == "true"
+    )
+
+    # Commit once per request instead of once per model save
+    DB_UNIT_OF_WORK = os.environ.get("DB_UNIT_OF_WORK", "true").lower() == "true"
+
+    # Query profiler, flags N+1 patterns and slow statements per request
+    QUERY_PROFILER = os.environ.get("QUERY_PROFILER", "true").lower() == "true"
+    QUERY_N_PLUS_ONE_THRESHOLD = int(os.environ.get("QUERY_N_PLUS_ONE_THRESHOLD", 10))
+    QUERY_SLOW_MS = int(os.environ.get("QUERY_SLOW_MS", 200))
+    QUERY_PROFILER_STRICT = False
+
+    # Read replica used for GET requests when configured
+    DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(
+        os.environ.get("REPLICA_READ_YOUR_WRITES_SECONDS", 5)
+    )
+
     # Flask mail configurations
     MAIL_SERVER = os.environ.get("MAIL_SERVER")
     MAIL_PORT = os.environ.get("MAIL_PORT")
-    MAIL_USE_TLS = bool(os.environ.get("MAIL_USE_TLS").lower() == "true")
-    MAIL_USE_SSL = bool(os.environ.get("MAIL_USE_SSL").lower() == "true")
+    MAIL_USE_TLS = bool(os.environ.get("MAIL_USE_TLS", "false").lower() == "true")
+    MAIL_USE_SSL = bool(os.environ.get("MAIL_USE_SSL", "false").lower() == "true")
     MAIL_USERNAME = os.environ.get("MAIL_USERNAME")
     MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.environ.get("MAIL_DEFAULT_SENDER")
 
+    # Response compression
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 500))
+    COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
+    COMPRESS_BR_LEVEL = int(os.environ.get("COMPRESS_BR_LEVEL", 4))
+    COMPRESS_ZSTD_LEVEL = int(os.environ.get("COMPRESS_ZSTD_LEVEL", 3))
+    COMPRESS_CACHE_TTL = int(os.environ.get("COMPRESS_CACHE_TTL", 30))
+    COMPRESS_CACHE_MAX_ENTRIES = int(os.environ.get("COMPRESS_CACHE_MAX_ENTRIES", 512))
+    # Seconds concurrent misses on one key wait for the first to fill it, 0 to
+    # let each run the view
+    COMPRESS_CACHE_COALESCE_TIMEOUT = float(
+        os.environ.get("COMPRESS_CACHE_COALESCE_TIMEOUT", 5)
+    )
+
+    # Pagination totals: "exact" counts every page, "cached" reuses a total
+    # refreshed in the background, "none" skips the count
+    PAGINATION_COUNT = os.environ.get("PAGINATION_COUNT", "exact")
+    PAGINATION_TOTAL_TTL = int(os.environ.get("PAGINATION_TOTAL_TTL", 60))
+
+    # Most products one batch request may ask for
+    PRODUCT_BATCH_MAX = int(os.environ.get("PRODUCT_BATCH_MAX", 100))
+
+    # Most changes one change feed page returns
+    CHANGE_FEED_PAGE_SIZE = int(os.environ.get("CHANGE_FEED_PAGE_SIZE", 500))
+
+    # Live product streams: poll interval, keepalive and reconnect period
+    STREAM_INTERVAL = float(os.environ.get("STREAM_INTERVAL", 1.0))
+    STREAM_HEARTBEAT = int(os.environ.get("STREAM_HEARTBEAT", 15))
+    STREAM_MAX_SECONDS = int(os.environ.get("STREAM_MAX_SECONDS", 300))
+    STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", 100))
+
+    # Batches a background event subscriber may fall behind by
+    EVENT_BUS_QUEUE_SIZE = int(os.environ.get("EVENT_BUS_QUEUE_SIZE", 1000))
+
+    # Neighbors kept per product by flask related-products
+    RELATED_PRODUCTS_TOP_K = int(os.environ.get("RELATED_PRODUCTS_TOP_K", 20))
+    # Age an order must reach before it is indexed, longer than any transaction
+    RELATED_PRODUCTS_SETTLE_SECONDS = int(
+        os.environ.get("RELATED_PRODUCTS_SETTLE_SECONDS", 60)
+    )
+
+    # Orders per order history page unless the client asks for fewer or more
+    ORDER_HISTORY_PAGE_SIZE = int(os.environ.get("ORDER_HISTORY_PAGE_SIZE", 20))
+
+    # Sales analytics, readable by users holding this role
+    ANALYTICS_ADMIN_ROLE = os.environ.get("ANALYTICS_ADMIN_ROLE", "admin")
+    ANALYTICS_MAX_DAYS = int(os.environ.get("ANALYTICS_MAX_DAYS", 366))
+
+    # Admission control, per worker. 0 disables it; gunicorn.conf.py sets it
+    # from the thread count
+    ADMISSION_LIMIT = int(os.environ.get("ADMISSION_LIMIT", 0))
+    ADMISSION_QUEUE_SIZE = int(os.environ.get("ADMISSION_QUEUE_SIZE", 16))
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 2.0))
+    ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", 1))
+    ADMISSION_ADAPTIVE = os.environ.get("ADMISSION_ADAPTIVE", "false").lower() == "true"
+    ADMISSION_MIN_LIMIT = int(os.environ.get("ADMISSION_MIN_LIMIT", 1))
+    # Path prefixes with a fixed priority, None is never limited. Other reads
+    # are "low" and writes "normal"
+    ADMISSION_ROUTE_PRIORITIES = {
+        "/api/auth": "critical",
+        "/metrics": None,
+    }
+
+    # Seconds a request may run, also the cap on its SQL statements. 0 disables
+    REQUEST_DEADLINE = float(os.environ.get("REQUEST_DEADLINE", 10))
+    # SQLite VM steps between deadline checks of a running statement
+    SQLITE_PROGRESS_STEPS = int(os.environ.get("SQLITE_PROGRESS_STEPS", 1000))
+
+    # Idempotency-Key responses are replayed for this many seconds. Retries of
+    # a running request wait up to IDEMPOTENCY_WAIT for it, and a request still
+    # unfinished after IDEMPOTENCY_LOCK_TIMEOUT is assumed lost
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 86400))
+    IDEMPOTENCY_WAIT = float(os.environ.get("IDEMPOTENCY_WAIT", 10))
+    IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get("IDEMPOTENCY_LOCK_TIMEOUT", 60))
+
     # Uploads Folder
     MEDIA_PATH = os.path.join(BASE_DIR, "media")
     PRODUCT_IMAGES_FOLDER = os.path.join(MEDIA_PATH, "product_images")
     RECEIPTS_FOLDER = os.path.join(MEDIA_PATH, "receipts")
 
-    os.makedirs(MEDIA_PATH, exist_ok=True)
-    os.makedirs(PRODUCT_IMAGES_FOLDER, exist_ok=True)
-    os.makedirs(RECEIPTS_FOLDER, exist_ok=True)
+    # Metrics, shared between worker processes through this directory
+    METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_INTERVAL = int(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+
+    # API documentation
+    API_DOCS_URL = os.environ.get("API_DOCS_URL", "/docs")
+    OPENAPI_SPEC_PATH = os.environ.get("OPENAPI_SPEC_PATH")
+    OPENAPI_LAZY = False
 
 
 class DevConfig(Config):
@@ -45,7 +162,7 @@ class DevConfig(Config):
 
     SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(BASE_DIR, "dev.db")
     DEBUG = True
-    SQLALCHEMY_ECHO = True
+    SQLALCHEMY_ECHO = False
 
 
 class TestConfig(Config):
@@ -54,10 +171,27 @@ class TestConfig(Config):
     SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(BASE_DIR, "test.db")
     DEBUG = True
     TESTING = True
-    SQLALCHEMY_ECHO = True
+    SQLALCHEMY_ECHO = False
+    QUERY_PROFILER_STRICT = True
 
 
 class ProdConfig(Config):
     """Defines Production Configuration"""
 
-    pass
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        "DATABASE_URL", "sqlite:///" + os.path.join(BASE_DIR, "prod.db")
+    )
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Applied to every new SQLite connection
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 268435456)),
+        "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE", -65536)),
+        "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)),
+    }
+
+    # Docs are only registered when asked for, and the spec is built lazily
+    API_DOCS_URL = os.environ.get("API_DOCS_URL", "")
+    OPENAPI_LAZY = os.environ.get("OPENAPI_LAZY", "true").lower() == "true"
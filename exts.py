@@ -3,8 +3,10 @@ from flask_mail import Mail
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
+from routing import RoutingSession
+
 # Initialize Extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
 migrate = Migrate()
 mail = Mail()
@@ -0,0 +1,69 @@
+"""
+Production server settings, read by gunicorn from the working directory.
+
+    gunicorn            # serves wsgi:app with ProdConfig
+
+The app is imported once in the master and workers are forked from it, sharing
+its memory copy-on-write. Every setting can be changed through the environment.
+
+Graceful reload:
+    kill -HUP <master>   restart workers, finishing in-flight requests
+    kill -USR2 <master>  start a new master on new code, then send WINCH and
+                         QUIT to the old one for a zero-downtime deploy
+"""
+
+import gc
+import multiprocessing
+import os
+import tempfile
+
+wsgi_app = "wsgi:app"
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', 8000)}")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+pidfile = os.environ.get("GUNICORN_PIDFILE")
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")
+errorlog = "-"
+
+# Workers merge their /metrics from snapshot files, and a preloaded app can
+# build the OpenAPI spec once in the master instead of in every worker
+os.environ.setdefault(
+    "METRICS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "mimi-metrics")
+)
+os.environ.setdefault("OPENAPI_LAZY", "false")
+
+# Requests past the admission limit wait on a thread, so leave a quarter of
+# the threads for the queue and let gunicorn hold anything beyond that
+if threads > 1:
+    os.environ.setdefault("ADMISSION_LIMIT", str(max(1, threads * 3 // 4)))
+    os.environ.setdefault(
+        "ADMISSION_QUEUE_SIZE", str(threads - int(os.environ["ADMISSION_LIMIT"]))
+    )
+
+
+def on_starting(server):
+    # Snapshots left by a previous master belong to dead workers
+    directory = os.environ["METRICS_MULTIPROC_DIR"]
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.startswith("metrics-"):
+                os.remove(os.path.join(directory, name))
+
+
+def when_ready(server):
+    # Keep the preloaded objects out of the collector so forks don't touch them
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from utilities import dispose_engines
+    from wsgi import app
+
+    dispose_engines(app)
@@ -1,18 +1,22 @@
+import os
+
 from flask import Flask, make_response, jsonify
 from flask_restx import Api, Resource
 
 from exts import db, jwt, migrate, mail
-from api import auth_ns, product_ns, categories_ns, product_images_ns
-from models import (
-    Role,
-    User,
-    AuditLog,
-    Order,
-    Receipt,
-    Cart,
-    Product,
-    Category,
-    ProductImage,
+from utilities import (
+    FastJSONProvider,
+    admission,
+    output_json,
+    compression,
+    configure_engines,
+    deadlines,
+    category_cache,
+    event_bus,
+    idempotency,
+    product_broadcaster,
+    metrics,
+    query_profiler,
 )
 
 
@@ -26,25 +30,72 @@ def create_app(config):
     Returns:
         Flask: Configured Flask application instance.
     """
+    from api import (
+        auth_ns,
+        product_ns,
+        categories_ns,
+        product_images_ns,
+        analytics_ns,
+        orders_ns,
+    )
+    from commands import register_commands
+    from models import (
+        BinaryUUID,
+        init_change_log,
+        init_sales_rollups,
+        init_unit_of_work,
+    )
+    from routing import init_replica_routing
+    from utilities.openapi import register_spec
 
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(config)
+
+    # Make sure upload folders exist
+    for folder in ("MEDIA_PATH", "PRODUCT_IMAGES_FOLDER", "RECEIPTS_FOLDER"):
+        os.makedirs(app.config[folder], exist_ok=True)
+
     api = Api(
         app,
         title="Mimi Super Style",
         version="1.0",
         description="Welcome to Mimi Super Style online store.",
-        doc="/docs",
+        doc=app.config.get("API_DOCS_URL") or False,
     )
+    api.representations["application/json"] = output_json
     api.add_namespace(auth_ns, path="/api/auth")
     api.add_namespace(product_ns, path="/api/product")
     api.add_namespace(categories_ns, path="/api/categories")
     api.add_namespace(product_images_ns, path="/api/images")
+    api.add_namespace(analytics_ns, path="/api/analytics")
+    api.add_namespace(orders_ns, path="/api/orders")
+    app.extensions["api"] = api
 
     db.init_app(app)
+    BinaryUUID.legacy_lookups = app.config.get("UUID_LEGACY_LOOKUPS", False)
+    configure_engines(app)
+    metrics.init_app(app)
+    admission.init_app(app)
+    query_profiler.init_app(app)
+    init_replica_routing(app)
+    # Ahead of idempotency so the responses it stores and replays are
+    # uncompressed, and encoded last for each request
+    compression.init_app(app)
+    # Before the unit of work so responses are stored only once committed
+    idempotency.init_app(app)
+    init_unit_of_work(app)
+    # After the unit of work so the deadline settles the response before commit
+    deadlines.init_app(app)
+    category_cache.init_app(app)
+    init_change_log(app)
+    init_sales_rollups(app)
+    event_bus.init_app(app)
     jwt.init_app(app)
     mail.init_app(app)
     migrate.init_app(app, db)
+    product_broadcaster.init_app(app)
+    register_commands(app)
 
     @api.route("/welcome")
     class Welcome(Resource):
@@ -56,6 +107,18 @@ def create_app(config):
 
     @app.shell_context_processor
     def make_shell_context():
+        from models import (
+            Role,
+            User,
+            AuditLog,
+            Order,
+            Receipt,
+            Cart,
+            Product,
+            Category,
+            ProductImage,
+        )
+
         return {
             "db": db,
             "Role": Role,
@@ -69,4 +132,7 @@ def create_app(config):
             "ProductImage": ProductImage,
         }
 
+    # Serve the OpenAPI spec from a copy serialized once
+    register_spec(api, app)
+
     return app
@@ -1,5 +1,11 @@
-from .base import Base
+from .base import Base, commit, unit_of_work, init_unit_of_work
+from .types import BinaryUUID, normalize_uuid
 from .user import Role, User, AuditLog
 from .order import Order, Receipt
 from .cart import Cart
 from .product import Product, Category, ProductImage
+from .cache import CacheVersion
+from .change_log import ProductChange, init_change_log
+from .related import CoPurchase, RelatedProduct
+from .sales import DailyCategorySales, DailyProductSales, init_sales_rollups
+from .idempotency import IdempotencyRecord
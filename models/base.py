@@ -1,6 +1,71 @@
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
+
+from flask import g, has_app_context
+
 from exts import db
+from .types import BinaryUUID
+
+
+def in_unit_of_work():
+    """Check if model mutations are batched into a single commit"""
+    return has_app_context() and g.get("unit_of_work", False)
+
+
+def commit():
+    """Commit now, or only flush when a unit of work will commit later"""
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """Commit every model mutation in the block at once, rolling back on error"""
+    if in_unit_of_work():
+        # Nested blocks join the outer unit of work
+        yield db.session
+        return
+
+    g.unit_of_work = True
+    try:
+        yield db.session
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        g.unit_of_work = False
+
+
+def init_unit_of_work(app):
+    """Give each request a single commit when ``DB_UNIT_OF_WORK`` is enabled"""
+    if not app.config.get("DB_UNIT_OF_WORK"):
+        return
+
+    @app.before_request
+    def begin_unit_of_work():
+        g.unit_of_work = True
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        if not g.get("unit_of_work"):
+            return response
+        g.unit_of_work = False
+        # A rejected request must not leave half of its changes behind
+        if response.status_code >= 400:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        return response
+
+    @app.teardown_request
+    def rollback_unit_of_work(exc):
+        if g.get("unit_of_work"):
+            g.unit_of_work = False
+            db.session.rollback()
 
 
 class Base(db.Model):
@@ -9,25 +74,25 @@ class Base(db.Model):
     __abstract__ = True
     id = db.Column(db.Integer, primary_key=True)
     uuid = db.Column(
-        db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4())
+        BinaryUUID, unique=True, nullable=False, default=lambda: str(uuid.uuid4())
     )
-    created_at = db.Column(db.DateTime, default=datetime.utcnow())
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow(), onupdate=datetime.utcnow
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
     # Save method
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     # Update method
     def update(self, **kwargs):
         for key, value in kwargs.items():
             setattr(self, key, value)
-        db.session.commit()
+        commit()
 
     # Delete method
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
@@ -0,0 +1,11 @@
+from exts import db
+
+
+# Version counters of data cached in every worker
+class CacheVersion(db.Model):
+    __tablename__ = "cache_version"
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CacheVersion {self.name} {self.version}>"
@@ -0,0 +1,104 @@
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import event, insert, select, update
+
+from exts import db
+from .cache import CacheVersion
+from .product import Category, Product, ProductImage
+from .types import BinaryUUID
+
+CHANGE_LOCK_NAME = "catalog_changes"
+
+
+# Append-only log of product changes, read by the change feed
+class ProductChange(db.Model):
+    __tablename__ = "product_change"
+    # The id is the change token, primary key order is change order
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    product_uuid = db.Column(BinaryUUID, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ProductChange {self.id} {self.product_uuid}>"
+
+
+def _modified(session, objects, model):
+    return [
+        obj for obj in objects if isinstance(obj, model) and session.is_modified(obj)
+    ]
+
+
+def _collect_changes(session, flush_context, instances):
+    # Deleted rows can't be read back after the flush, keep what the log needs
+    deleted = session.info.setdefault("deleted_products", {})
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            deleted[obj.id] = obj.uuid
+
+    touched = session.info.setdefault("touched_products", set())
+    for obj in chain(session.deleted, _modified(session, session.dirty, ProductImage)):
+        if isinstance(obj, ProductImage):
+            touched.add(obj.product_id)
+
+    renamed = session.info.setdefault("renamed_categories", set())
+    for obj in _modified(session, session.dirty, Category):
+        renamed.add(obj.id)
+
+
+def _write_changes(session, flush_context):
+    deleted = session.info.pop("deleted_products", {})
+    touched = session.info.pop("touched_products", set())
+    renamed = session.info.pop("renamed_categories", set())
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, Product) and (
+            obj in session.new or session.is_modified(obj)
+        ):
+            touched.add(obj.id)
+        elif isinstance(obj, ProductImage) and obj in session.new:
+            touched.add(obj.product_id)
+    touched -= set(deleted)
+    if not (deleted or touched or renamed):
+        return
+
+    # Holding the lock row until commit makes change ids follow commit order
+    result = session.execute(
+        update(CacheVersion.__table__)
+        .where(CacheVersion.name == CHANGE_LOCK_NAME)
+        .values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        session.execute(
+            insert(CacheVersion.__table__).values(name=CHANGE_LOCK_NAME, version=1)
+        )
+
+    rows = [
+        {"product_id": id, "product_uuid": uuid, "deleted": True}
+        for id, uuid in deleted.items()
+    ]
+    if touched or renamed:
+        products = select(Product.id, Product.uuid).where(
+            Product.id.in_(touched) | Product.category_id.in_(renamed)
+        )
+        rows += [
+            {"product_id": id, "product_uuid": uuid, "deleted": False}
+            for id, uuid in session.execute(products)
+            if id not in deleted
+        ]
+    if rows:
+        session.execute(insert(ProductChange.__table__), rows)
+
+
+def _discard_changes(session):
+    for key in ("deleted_products", "touched_products", "renamed_categories"):
+        session.info.pop(key, None)
+
+
+def init_change_log(app):
+    """Log product, image and category writes in the same transaction"""
+    if not event.contains(db.session, "before_flush", _collect_changes):
+        event.listen(db.session, "before_flush", _collect_changes)
+        event.listen(db.session, "after_flush", _write_changes)
+        event.listen(db.session, "after_rollback", _discard_changes)
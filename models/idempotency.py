@@ -0,0 +1,18 @@
+from exts import db
+
+
+# Responses of write requests sent with an Idempotency-Key header
+class IdempotencyRecord(db.Model):
+    __tablename__ = "idempotency_record"
+    # sha256 of the caller's identity and key
+    key = db.Column(db.String(64), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # Null while the first request is still running
+    status_code = db.Column(db.Integer)
+    headers = db.Column(db.Text)
+    body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyRecord {self.key[:12]} {self.status_code}>"
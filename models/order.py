@@ -14,6 +14,26 @@ class Order(Base):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
 
+    # Order history pages, newest first, with and without a status filter.
+    # Postgres also carries the listed columns so pages skip the table
+    __table_args__ = (
+        db.Index(
+            "ix_order_user_history",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_include=["uuid", "status", "product_id", "quantity", "price"],
+        ),
+        db.Index(
+            "ix_order_user_status_history",
+            "user_id",
+            "status",
+            "created_at",
+            "id",
+            postgresql_include=["uuid", "product_id", "quantity", "price"],
+        ),
+    )
+
     def __repr__(self):
         return f"<Order {self.id} - {self.status}>"
 
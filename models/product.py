@@ -20,6 +20,9 @@ class ProductImage(Base):
 
     product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
 
+    # A product's images in upload order, its first one being the cover
+    __table_args__ = (db.Index("ix_product_images_product", "product_id", "id"),)
+
     def __repr__(self):
         return f"<ProductImage {self.image_url}>"
 
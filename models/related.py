@@ -0,0 +1,25 @@
+from exts import db
+
+
+# Sparse co-purchase matrix: distinct users who ordered both products, stored
+# in both directions
+class CoPurchase(db.Model):
+    __tablename__ = "co_purchase"
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    other_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<CoPurchase {self.product_id} {self.other_id} {self.count}>"
+
+
+# Top neighbors of each product in the co-purchase matrix, read by rank
+class RelatedProduct(db.Model):
+    __tablename__ = "related_product"
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    rank = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    related_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<RelatedProduct {self.product_id} #{self.rank} {self.related_id}>"
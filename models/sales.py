@@ -0,0 +1,144 @@
+from collections import defaultdict
+
+from sqlalchemy import event, inspect, select
+
+from exts import db
+from .order import Order
+from .product import Product
+
+# Orders in these states don't count as sales
+EXCLUDED_STATUSES = ("cancelled",)
+MEASURES = ("orders", "units", "revenue")
+ORDER_FIELDS = ("product_id", "created_at", "status", "quantity", "price")
+
+
+# Sales of one product on one day
+class DailyProductSales(db.Model):
+    __tablename__ = "daily_product_sales"
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyProductSales {self.day} {self.product_id}>"
+
+
+# Sales of one category on one day
+class DailyCategorySales(db.Model):
+    __tablename__ = "daily_category_sales"
+    day = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyCategorySales {self.day} {self.category_id}>"
+
+
+def increment_statement(bind, model):
+    """INSERT adding its values to the measures of an existing rollup row"""
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(model)
+    return statement.on_conflict_do_update(
+        index_elements=[column for column in model.__table__.primary_key],
+        set_={
+            name: getattr(model, name) + getattr(statement.excluded, name)
+            for name in MEASURES
+        },
+    )
+
+
+def _contribution(product_id, created_at, status, quantity, price):
+    if status in EXCLUDED_STATUSES or created_at is None:
+        return None
+    return (created_at.date(), product_id), (1, quantity, quantity * price)
+
+
+def _collect_sales(session, flush_context, instances):
+    # What changed orders counted for before this flush, taken back afterwards.
+    # Read from the database, as an order expired by an earlier commit holds no
+    # old values in its attribute history
+    ids = [
+        inspect(obj).identity[0]
+        for obj in session.dirty | session.deleted
+        if isinstance(obj, Order)
+        and obj not in session.new
+        and (obj in session.deleted or session.is_modified(obj))
+    ]
+    if not ids:
+        return
+    rows = session.execute(
+        select(*(getattr(Order, key) for key in ORDER_FIELDS)).where(Order.id.in_(ids))
+    )
+    removed = session.info.setdefault("sales_removed", [])
+    removed.extend(_contribution(*row) for row in rows)
+
+
+def _write_sales(session, flush_context):
+    removed = session.info.pop("sales_removed", [])
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for contribution in removed:
+        if contribution is not None:
+            key, values = contribution
+            for i, value in enumerate(values):
+                deltas[key][i] -= value
+
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Order) and (obj in session.new or session.is_modified(obj)):
+            contribution = _contribution(*(getattr(obj, key) for key in ORDER_FIELDS))
+            if contribution is not None:
+                key, values = contribution
+                for i, value in enumerate(values):
+                    deltas[key][i] += value
+
+    deltas = {key: values for key, values in deltas.items() if any(values)}
+    if not deltas:
+        return
+
+    categories = dict(
+        session.execute(
+            select(Product.id, Product.category_id).where(
+                Product.id.in_({product_id for _, product_id in deltas})
+            )
+        ).all()
+    )
+    by_category = defaultdict(lambda: [0, 0, 0.0])
+    for (day, product_id), values in deltas.items():
+        totals = by_category[day, categories.get(product_id)]
+        for i, value in enumerate(values):
+            totals[i] += value
+
+    bind = session.get_bind(mapper=inspect(Order))
+    session.execute(
+        increment_statement(bind, DailyProductSales),
+        [
+            {"day": day, "product_id": product_id, **dict(zip(MEASURES, values))}
+            for (day, product_id), values in deltas.items()
+        ],
+    )
+    rows = [
+        {"day": day, "category_id": category_id, **dict(zip(MEASURES, values))}
+        for (day, category_id), values in by_category.items()
+        if category_id is not None
+    ]
+    if rows:
+        session.execute(increment_statement(bind, DailyCategorySales), rows)
+
+
+def _discard_sales(session):
+    session.info.pop("sales_removed", None)
+
+
+def init_sales_rollups(app):
+    """Keep the daily sales rollups in step with order writes, in the same transaction"""
+    if not event.contains(db.session, "before_flush", _collect_sales):
+        event.listen(db.session, "before_flush", _collect_sales)
+        event.listen(db.session, "after_flush", _write_sales)
+        event.listen(db.session, "after_rollback", _discard_sales)
@@ -0,0 +1,77 @@
+import uuid
+
+from sqlalchemy import String, and_, or_, type_coerce
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import BINARY, TypeDecorator
+
+
+def normalize_uuid(value):
+    """Canonical string form of a UUID, or None when it is not one"""
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+
+class BinaryUUID(TypeDecorator):
+    """
+    UUID stored as 16 bytes, or as a native ``uuid`` on PostgreSQL.
+
+    Values go in and come out as canonical strings, so the API never sees the
+    storage form. A value that is not a UUID binds as NULL and matches nothing.
+
+    While ``legacy_lookups`` is set, comparisons with strings also match rows
+    still holding the 36 character text form, for the window in which
+    ``flask migrate-uuids`` converts existing rows.
+    """
+
+    impl = BINARY(16)
+    cache_ok = True
+    legacy_lookups = False
+
+    class comparator_factory(TypeDecorator.Comparator):
+        def __eq__(self, other):
+            expr = super().__eq__(other)
+            if BinaryUUID.legacy_lookups and isinstance(other, str):
+                expr = or_(expr, self.expr == type_coerce(other, String))
+            return expr
+
+        def __ne__(self, other):
+            expr = super().__ne__(other)
+            if BinaryUUID.legacy_lookups and isinstance(other, str):
+                expr = and_(expr, self.expr != type_coerce(other, String))
+            return expr
+
+        def in_(self, other):
+            expr = super().in_(other)
+            if (
+                BinaryUUID.legacy_lookups
+                and isinstance(other, (list, tuple))
+                and all(isinstance(value, str) for value in other)
+            ):
+                expr = or_(
+                    expr, self.expr.in_([type_coerce(value, String) for value in other])
+                )
+            return expr
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(BINARY(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            value = value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+        except ValueError:
+            return None
+        return str(value) if dialect.name == "postgresql" else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, bytes) and len(value) == 16:
+            return str(uuid.UUID(bytes=value))
+        # Rows not converted yet by flask migrate-uuids
+        return str(value)
@@ -0,0 +1,113 @@
+import time
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = "replica"
+READ_PRIMARY_COOKIE = "read_primary_until"
+READ_METHODS = {"GET", "HEAD"}
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to the ``replica`` bind during read requests.
+
+    Everything else goes to the primary: flushes, DML and raw statements, and
+    every statement issued after the session has pending changes, so a request
+    that writes keeps reading its own data from the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if not has_app_context() or not g.get("db_read_replica"):
+            return False
+
+        if self._flushing or not self._is_clean():
+            # Stay on the primary for the rest of the request once it writes
+            g.db_read_replica = False
+            return False
+
+        if not isinstance(clause, (sa.Select, sa.CompoundSelect)):
+            return False
+
+        return REPLICA_BIND in self._db.engines
+
+
+def read_primary(func):
+    """Mark a GET resource method that must read from the primary database"""
+    func.read_primary = True
+    return func
+
+
+def read_only(func):
+    """Mark a POST resource method that only reads, like a lookup with a long body"""
+    func.read_only = True
+    return func
+
+
+def view_method():
+    """Resource method handling the current request, to read its markers"""
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(getattr(view, "view_class", None), request.method.lower(), None)
+
+
+def is_read_request():
+    """Check if the current request only reads, a GET or a read_only method"""
+    if request.method in READ_METHODS:
+        return True
+    return getattr(view_method(), "read_only", False)
+
+
+@contextmanager
+def use_primary():
+    """Send every statement inside the block to the primary database"""
+    previous = g.get("db_read_replica", False)
+    g.db_read_replica = False
+    try:
+        yield
+    finally:
+        g.db_read_replica = previous
+
+
+def _reads_from_replica():
+    if not is_read_request():
+        return False
+
+    if getattr(view_method(), "read_primary", False):
+        return False
+
+    # Read-your-writes: clients that just wrote keep reading the primary
+    try:
+        until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+    except ValueError:
+        until = 0
+    return until < time.time()
+
+
+def init_replica_routing(app):
+    """Route read requests to the replica bind when one is configured"""
+    if REPLICA_BIND not in app.config.get("SQLALCHEMY_BINDS", {}):
+        return
+
+    @app.before_request
+    def select_database():
+        g.db_read_replica = _reads_from_replica()
+
+    @app.after_request
+    def remember_write(response):
+        if not is_read_request() and response.status_code < 400:
+            seconds = app.config["REPLICA_READ_YOUR_WRITES_SECONDS"]
+            response.set_cookie(
+                READ_PRIMARY_COOKIE,
+                str(time.time() + seconds),
+                max_age=seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -1,3 +1,8 @@
+from dotenv import load_dotenv
+
+# Environment must be loaded before the config classes read it
+load_dotenv()
+
 from main import create_app
 from config import DevConfig
 
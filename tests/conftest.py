@@ -0,0 +1,94 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from config import TestConfig
+from exts import db
+from main import create_app
+from models import Category, Order, Product, User
+
+PASSWORD = "test-password"
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Application on its own SQLite database, with the schema created"""
+    settings = type(
+        "Settings",
+        (TestConfig,),
+        {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}"},
+    )
+    app = create_app(settings)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def ctx(app):
+    """App context for tests working with the session directly"""
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+
+def make_category(name="shoes"):
+    category = Category(name=name)
+    db.session.add(category)
+    db.session.commit()
+    return category
+
+
+def make_product(category, name="sneaker", price=10.0, in_stock=5):
+    product = Product(
+        product_name=name,
+        current_price=price,
+        in_stock=in_stock,
+        category_id=category.id,
+    )
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def make_user(email="buyer@example.com", username="buyer", verified=True):
+    user = User(
+        email=email,
+        username=username,
+        telephone=email,
+        password_hash=generate_password_hash(PASSWORD),
+        is_verified=verified,
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_order(user, product, quantity=1, price=10.0, status="pending", **fields):
+    order = Order(
+        user_id=user.id,
+        product_id=product.id,
+        quantity=quantity,
+        price=price,
+        status=status,
+        **fields,
+    )
+    db.session.add(order)
+    db.session.commit()
+    return order
+
+
+def login(client, user):
+    """Authorization header for a user"""
+    response = client.post(
+        "/api/auth/login", json={"email": user.email, "password": PASSWORD}
+    )
+    return {"Authorization": f"Bearer {response.json['data']['access_token']}"}
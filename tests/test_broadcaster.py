@@ -0,0 +1,108 @@
+import queue
+import time
+
+import pytest
+
+from exts import db
+from models import Product
+from utilities import product_broadcaster
+
+from .conftest import make_category, make_product
+
+
+@pytest.fixture
+def broadcaster(app, ctx):
+    app.config["STREAM_INTERVAL"] = 0.02
+    yield product_broadcaster
+    for subscription in list(product_broadcaster._subscriptions):
+        product_broadcaster.unsubscribe(subscription)
+    thread = product_broadcaster._thread
+    if thread is not None:
+        thread.join(timeout=2)
+
+
+def subscribe(broadcaster, products=(), categories=()):
+    subscription = broadcaster.subscribe(
+        [product.id for product in products], [category.id for category in categories]
+    )
+    return subscription, broadcaster.snapshot(subscription)[1]
+
+
+def update(product, **values):
+    db.session.get(Product, product.id).update(**values)
+    db.session.commit()
+
+
+def next_events(subscription, timeout=2):
+    return subscription.queue.get(timeout=timeout)[1]
+
+
+def assert_quiet(subscription, wait=0.2):
+    with pytest.raises(queue.Empty):
+        subscription.queue.get(timeout=wait)
+
+
+def test_existing_stream_sees_a_change_a_new_snapshot_already_shows(broadcaster):
+    product = make_product(make_category(), in_stock=3)
+    first, snapshot = subscribe(broadcaster, products=[product])
+    assert snapshot[0]["in_stock"] == 3
+
+    update(product, in_stock=50)
+    # A second client subscribes before the poller saw the change
+    second, snapshot = subscribe(broadcaster, products=[product])
+    assert snapshot[0]["in_stock"] == 50
+
+    assert next_events(first)[0]["in_stock"] == 50
+
+
+def test_updates_fan_out_by_product_and_category(broadcaster):
+    shoes, hats = make_category("shoes"), make_category("hats")
+    sneaker = make_product(shoes, name="sneaker")
+    boot = make_product(shoes, name="boot")
+    cap = make_product(hats, name="cap")
+    by_product, _ = subscribe(broadcaster, products=[sneaker])
+    by_category, _ = subscribe(broadcaster, categories=[shoes])
+    other, _ = subscribe(broadcaster, products=[cap])
+
+    update(sneaker, current_price=12.5)
+    update(boot, flash_sale=True)
+
+    events = next_events(by_product)
+    assert [(event["uuid"], event["current_price"]) for event in events] == [
+        (sneaker.uuid, 12.5)
+    ]
+    received = []
+    while len(received) < 2:
+        received += next_events(by_category)
+    assert {event["uuid"] for event in received} == {sneaker.uuid, boot.uuid}
+    assert_quiet(other)
+
+
+def test_changes_outside_live_fields_are_not_pushed(broadcaster):
+    product = make_product(make_category())
+    subscription, _ = subscribe(broadcaster, products=[product])
+    # Let the poller record the product's live values first
+    update(product, in_stock=6)
+    assert next_events(subscription)[0]["in_stock"] == 6
+
+    update(product, description="longer text")
+    assert_quiet(subscription)
+
+
+def test_change_back_after_an_idle_period_is_pushed(broadcaster):
+    product = make_product(make_category(), in_stock=3)
+    subscription, _ = subscribe(broadcaster, products=[product])
+    update(product, in_stock=4)
+    assert next_events(subscription)[0]["in_stock"] == 4
+    broadcaster.unsubscribe(subscription)
+    broadcaster._thread.join(timeout=2)
+
+    # Changed while nobody listened, then back to what was last pushed
+    update(product, in_stock=9)
+    subscription, snapshot = subscribe(broadcaster, products=[product])
+    assert snapshot[0]["in_stock"] == 9
+    time.sleep(0.1)
+    update(product, in_stock=4)
+    events = []
+    while not any(event["in_stock"] == 4 for event in events):
+        events += next_events(subscription)
@@ -0,0 +1,13 @@
+from utilities.category_cache import category_cache
+
+from .conftest import make_category
+
+
+def test_get_accepts_any_uuid_spelling(app):
+    with app.test_request_context():
+        category = make_category()
+        cached = category_cache.get(category.uuid)
+        assert cached.name == "shoes"
+        assert category_cache.get(category.uuid.upper()) == cached
+        assert category_cache.get(category.uuid.replace("-", "")) == cached
+        assert category_cache.get("not-a-uuid") is None
@@ -0,0 +1,89 @@
+from sqlalchemy import select
+
+from exts import db
+from models import CacheVersion, Product
+from models.change_log import CHANGE_LOCK_NAME
+
+from .conftest import make_category, make_product
+
+
+def changes(client, since, limit=None):
+    query = {"since": since} if limit is None else {"since": since, "limit": limit}
+    response = client.get("/api/product/changes", query_string=query)
+    assert response.status_code == 200
+    return response.json
+
+
+def test_new_clients_get_the_current_token(app, client):
+    with app.app_context():
+        make_product(make_category())
+    page = client.get("/api/product/changes").json
+    assert page["upserted"] == page["deleted"] == []
+    assert page["since"] == page["next"] > 0
+    assert changes(client, page["next"])["upserted"] == []
+
+
+def test_changes_come_in_commit_order_with_the_latest_state(app, client):
+    token = client.get("/api/product/changes").json["next"]
+    with app.app_context():
+        category = make_category()
+        sneaker = make_product(category, "sneaker")
+        boot = make_product(category, "boot")
+        sandal = make_product(category, "sandal")
+        sneaker.current_price = 12.5
+        db.session.commit()
+        sandal_uuid = sandal.uuid
+        db.session.delete(sandal)
+        db.session.commit()
+
+    page = changes(client, token)
+    assert [product["product_name"] for product in page["upserted"]] == [
+        "sneaker",
+        "boot",
+    ]
+    assert page["upserted"][0]["current_price"] == 12.5
+    assert page["deleted"] == [sandal_uuid]
+    assert page["has_more"] is False
+
+
+def test_pages_walk_every_change_once(app, client):
+    token = client.get("/api/product/changes").json["next"]
+    with app.app_context():
+        category = make_category()
+        for name in ("a", "b", "c", "d", "e"):
+            make_product(category, name)
+
+    names, has_more = [], True
+    while has_more:
+        page = changes(client, token, limit=2)
+        assert page["since"] == token and page["next"] > token
+        names += [product["product_name"] for product in page["upserted"]]
+        token, has_more = page["next"], page["has_more"]
+    assert names == ["a", "b", "c", "d", "e"]
+    assert changes(client, token)["upserted"] == []
+
+
+def test_each_write_takes_the_commit_order_lock(app):
+    with app.app_context():
+        category = make_category()
+        make_product(category, "a")
+        make_product(category, "b")
+        version = db.session.execute(
+            select(CacheVersion.version).where(CacheVersion.name == CHANGE_LOCK_NAME)
+        ).scalar()
+        assert version == 2
+
+
+def test_rolled_back_writes_leave_no_change(app, client):
+    with app.app_context():
+        category_id = make_category().id
+    token = client.get("/api/product/changes").json["next"]
+    with app.app_context():
+        product = Product(
+            product_name="ghost", current_price=1.0, in_stock=1, category_id=category_id
+        )
+        db.session.add(product)
+        db.session.flush()
+        db.session.rollback()
+    assert changes(client, token)["upserted"] == []
+    assert client.get("/api/product/changes").json["next"] == token
@@ -0,0 +1,55 @@
+import time
+from types import SimpleNamespace
+
+from flask import g
+
+from exts import db
+from models import Category
+from utilities.deadline import deadlines
+
+
+class Cursor:
+    name = None
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+
+def postgres_connection():
+    return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), info={})
+
+
+def run(conn, cursor, left):
+    g.deadline = time.monotonic() + left
+    deadlines._before_cursor(conn, cursor, "SELECT 1", {}, None, False)
+
+
+def test_statement_timeout_is_set_once_per_transaction(app):
+    conn, cursor = postgres_connection(), Cursor()
+    with app.test_request_context():
+        run(conn, cursor, 10)
+        run(conn, cursor, 9)
+        run(conn, cursor, 6)
+        assert len(cursor.statements) == 1
+
+        # Far less time left than the timeout allows, lower it
+        run(conn, cursor, 4)
+        assert len(cursor.statements) == 2
+        assert conn.info["statement_timeout"] <= 4000
+
+        deadlines._begin(conn)
+        run(conn, cursor, 4)
+        assert len(cursor.statements) == 3
+
+
+def test_session_transactions_reset_the_timeout(app):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            conn.info["statement_timeout"] = 5000
+        db.session.add(Category(name="shoes"))
+        db.session.commit()
+        with db.engine.connect() as conn:
+            assert "statement_timeout" not in conn.info
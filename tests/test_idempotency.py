@@ -0,0 +1,75 @@
+import gzip
+
+import orjson
+from sqlalchemy import func, select
+
+from exts import db
+from models import Category
+
+
+def create(client, name, key="key-1", **headers):
+    return client.post(
+        "/api/categories/",
+        json={"name": name},
+        headers={"Idempotency-Key": key, **headers},
+    )
+
+
+def categories(app):
+    with app.app_context():
+        return db.session.execute(select(func.count(Category.id))).scalar()
+
+
+def test_retry_replays_the_stored_response(app, client):
+    first = create(client, "shoes")
+    retry = create(client, "shoes")
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.data == first.data
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert categories(app) == 1
+
+
+def test_reusing_a_key_for_another_request_is_rejected(app, client):
+    assert create(client, "shoes").status_code == 201
+    response = create(client, "boots")
+
+    assert response.status_code == 422
+    assert categories(app) == 1
+
+
+def test_keys_are_independent(app, client):
+    assert create(client, "shoes", key="key-1").status_code == 201
+    assert create(client, "boots", key="key-2").status_code == 201
+    assert categories(app) == 2
+
+
+def test_replays_are_encoded_for_the_retry(app, client):
+    app.config["COMPRESS_MIN_SIZE"] = 0
+    first = create(client, "shoes", **{"Accept-Encoding": "gzip"})
+    retry = create(client, "shoes")
+
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in retry.headers
+    assert orjson.loads(gzip.decompress(first.data)) == retry.json
+
+    again = create(client, "shoes", **{"Accept-Encoding": "gzip"})
+    assert again.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(again.data) == retry.data
+
+
+def test_server_errors_are_not_stored(app):
+    calls = []
+
+    @app.route("/flaky", methods=["POST"])
+    def flaky():
+        calls.append(1)
+        return ("", 503) if len(calls) == 1 else ("done", 200)
+
+    client = app.test_client()
+    headers = {"Idempotency-Key": "key-1"}
+    assert client.post("/flaky", headers=headers).status_code == 503
+    assert client.post("/flaky", headers=headers).status_code == 200
+    assert client.post("/flaky", headers=headers).data == b"done"
+    assert len(calls) == 2
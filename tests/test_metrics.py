@@ -0,0 +1,22 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from exts import db
+
+
+def leftovers(conn):
+    """Per-statement state still stored on the connection"""
+    return [value for value in conn.info.values() if isinstance(value, list) and value]
+
+
+def test_failed_statements_leave_no_start_times_behind(app):
+    with app.test_request_context(), db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+
+        assert g.db_statements == 1
+        assert leftovers(conn) == []
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from .conftest import login, make_category, make_order, make_product, make_user
+
+
+def test_pages_walk_every_order_newest_first(app, client, ctx):
+    user, other = make_user(), make_user("other@example.com", "other")
+    product = make_product(make_category())
+    start = datetime(2026, 1, 1)
+    orders = [
+        make_order(
+            user,
+            product,
+            status="paid" if i % 2 else "pending",
+            created_at=start + timedelta(hours=i // 2),
+        )
+        for i in range(7)
+    ]
+    make_order(other, product)
+    expected = [
+        str(order.uuid)
+        for order in sorted(orders, key=lambda o: (o.created_at, o.id), reverse=True)
+    ]
+    headers = login(client, user)
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/orders/?limit=3" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url, headers=headers).json
+        seen += [order["uuid"] for order in page["orders"]]
+        if not page["has_more"]:
+            break
+        cursor = page["next_cursor"]
+    assert seen == expected
+
+    paid = client.get("/api/orders/?status=paid", headers=headers).json
+    assert {order["status"] for order in paid["orders"]} == {"paid"}
+    assert len(paid["orders"]) == 3
+
+
+def test_invalid_cursor_is_rejected(client, ctx):
+    headers = login(client, make_user())
+    assert client.get("/api/orders/?cursor=nope", headers=headers).status_code == 400
@@ -0,0 +1,50 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from exts import db
+from utilities.query_profiler import QueryProfileError, fingerprint
+
+
+def test_failed_statements_are_not_profiled(app):
+    with app.test_request_context(), db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+
+        assert list(g.query_profile) == [fingerprint("SELECT 1")]
+        assert not conn.info.get("profiler_start")
+
+
+def n_plus_one_app(app, strict, queries):
+    app.config["QUERY_PROFILER_STRICT"] = strict
+
+    @app.route("/n-plus-one")
+    def n_plus_one():
+        for id in range(queries):
+            db.session.execute(text("SELECT :id"), {"id": id})
+        return "ok"
+
+    return app.test_client()
+
+
+def test_strict_mode_fails_requests_with_an_n_plus_one(app):
+    threshold = app.config["QUERY_N_PLUS_ONE_THRESHOLD"]
+    client = n_plus_one_app(app, True, threshold + 1)
+    with pytest.raises(QueryProfileError, match=f"ran {threshold + 1} similar queries"):
+        client.get("/n-plus-one")
+
+
+def test_strict_mode_allows_queries_up_to_the_threshold(app):
+    threshold = app.config["QUERY_N_PLUS_ONE_THRESHOLD"]
+    client = n_plus_one_app(app, True, threshold)
+    assert client.get("/n-plus-one").status_code == 200
+
+
+def test_n_plus_one_is_only_logged_outside_strict_mode(app, caplog):
+    threshold = app.config["QUERY_N_PLUS_ONE_THRESHOLD"]
+    client = n_plus_one_app(app, False, threshold + 1)
+    assert client.get("/n-plus-one").status_code == 200
+    assert f"Possible N+1: {threshold + 1} similar queries" in caplog.text
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from exts import db
+from models import CoPurchase
+from utilities.recommendations import refresh_related_products
+
+from .conftest import make_category, make_order, make_product, make_user
+
+SETTLED = datetime.utcnow() - timedelta(hours=1)
+
+
+def pair_count(first, second):
+    return db.session.execute(
+        select(CoPurchase.count).filter_by(product_id=first.id, other_id=second.id)
+    ).scalar()
+
+
+def test_recent_orders_wait_until_they_settle(ctx):
+    category = make_category()
+    shoe, sock = make_product(category), make_product(category, name="sock")
+    user = make_user()
+    make_order(user, shoe, created_at=SETTLED)
+    late = make_order(user, sock)
+
+    result = refresh_related_products(settle=60)
+    assert result["last_order"] == late.id - 1
+    assert pair_count(shoe, sock) is None
+
+    result = refresh_related_products(settle=0)
+    assert result["last_order"] == late.id
+    assert pair_count(shoe, sock) == 1
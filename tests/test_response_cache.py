@@ -0,0 +1,40 @@
+from exts import db
+from models import Product, User
+
+from .conftest import make_category, make_product, make_user
+
+
+def test_catalog_write_clears_cached_responses(client, ctx):
+    product = make_product(make_category(), name="sneaker")
+    path = f"/api/product/{product.uuid}"
+    assert client.get(path).headers["X-Cache"] == "MISS"
+    assert client.get(path).headers["X-Cache"] == "HIT"
+
+    db.session.get(Product, product.id).update(product_name="runner")
+    db.session.commit()
+
+    response = client.get(path)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json["product_name"] == "runner"
+
+
+def test_unrelated_write_keeps_cached_responses(client, ctx):
+    product = make_product(make_category())
+    path = f"/api/product/{product.uuid}"
+    client.get(path)
+
+    user = make_user()
+    db.session.get(User, user.id).update(address="somewhere")
+    db.session.commit()
+
+    assert client.get(path).headers["X-Cache"] == "HIT"
+
+
+def test_rejected_write_keeps_cached_responses(client, ctx):
+    product = make_product(make_category())
+    path = f"/api/product/{product.uuid}"
+    client.get(path)
+
+    response = client.put(path, data={"current_price": "-1"})
+    assert response.status_code >= 400
+    assert client.get(path).headers["X-Cache"] == "HIT"
@@ -0,0 +1,83 @@
+from sqlalchemy import select
+
+from exts import db
+from models import DailyCategorySales, DailyProductSales
+from utilities.sales_rollup import rebuild_sales_rollups
+
+from .conftest import make_category, make_order, make_product, make_user
+
+
+def totals(model, **key):
+    row = db.session.execute(select(model).filter_by(**key)).scalar_one_or_none()
+    return (row.orders, row.units, row.revenue) if row else None
+
+
+def product_totals(order):
+    return totals(
+        DailyProductSales, day=order.created_at.date(), product_id=order.product_id
+    )
+
+
+def test_new_order_is_counted(ctx):
+    category = make_category()
+    order = make_order(make_user(), make_product(category), quantity=2, price=10.0)
+    assert product_totals(order) == (1, 2, 20.0)
+    assert totals(
+        DailyCategorySales, day=order.created_at.date(), category_id=category.id
+    ) == (1, 2, 20.0)
+
+
+def test_update_after_commit_replaces_the_old_values(ctx):
+    order = make_order(make_user(), make_product(make_category()), quantity=2)
+    # The commit expired the order, so its old quantity is not in memory
+    order.quantity = 4
+    db.session.commit()
+    assert product_totals(order) == (1, 4, 40.0)
+
+
+def test_uncancelling_an_expired_order_adds_it_back(ctx):
+    order = make_order(make_user(), make_product(make_category()), quantity=3)
+    key = {"day": order.created_at.date(), "product_id": order.product_id}
+    order.status = "cancelled"
+    db.session.commit()
+    assert totals(DailyProductSales, **key) == (0, 0, 0.0)
+
+    # Untouched since the last commit, so expired again
+    order.status = "pending"
+    db.session.commit()
+    assert totals(DailyProductSales, **key) == (1, 3, 30.0)
+
+
+def test_deleted_order_is_taken_back(ctx):
+    order = make_order(make_user(), make_product(make_category()))
+    day, product_id = order.created_at.date(), order.product_id
+    db.session.delete(order)
+    db.session.commit()
+    assert totals(DailyProductSales, day=day, product_id=product_id) == (0, 0, 0.0)
+
+
+def test_rolled_back_write_leaves_rollups_alone(ctx):
+    order = make_order(make_user(), make_product(make_category()), quantity=2)
+    order.quantity = 9
+    db.session.flush()
+    db.session.rollback()
+    assert product_totals(order) == (1, 2, 20.0)
+
+
+def test_rebuild_matches_maintained_rollups(ctx):
+    user, category = make_user(), make_category()
+    products = [make_product(category, name=f"p{i}") for i in range(3)]
+    for i in range(10):
+        make_order(user, products[i % 3], quantity=i + 1, price=2.5)
+    make_order(user, products[0], status="cancelled")
+
+    def snapshot():
+        return sorted(
+            (row.day, row.product_id, row.orders, row.units, row.revenue)
+            for row in db.session.execute(select(DailyProductSales)).scalars()
+        )
+
+    maintained = snapshot()
+    rebuild_sales_rollups(batch_size=4)
+    db.session.expire_all()
+    assert snapshot() == maintained
@@ -0,0 +1,32 @@
+from sqlalchemy import func, select
+
+from exts import db
+from models import Category, DailyProductSales, Order
+
+
+def test_seed_command_fills_tables_and_rollups(app, ctx):
+    result = app.test_cli_runner().invoke(
+        args=[
+            "seed",
+            "--categories=2",
+            "--products=10",
+            "--images=5",
+            "--users=5",
+            "--carts=5",
+            "--orders=40",
+            "--workers=1",
+        ]
+    )
+    assert result.exit_code == 0, result.output
+    assert "flask related-products" in result.output
+
+    orders = db.session.scalar(
+        select(func.count()).select_from(Order).where(Order.status != "cancelled")
+    )
+    assert db.session.scalar(select(func.sum(DailyProductSales.orders))) == orders
+
+    # New rows get ids past the seeded ones
+    category = Category(name="after seeding")
+    db.session.add(category)
+    db.session.commit()
+    assert category.id == 3
@@ -0,0 +1,107 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from flask_restx import marshal
+from flask_restx.mask import MaskError
+
+from api.analytics_ns import category_sales_model
+from api.orders_ns import order_history_model
+from api.product_ns import product_batch_model, product_model
+from utilities.serializers import compile_model, serialize_with
+
+from .conftest import make_category
+
+CATEGORY = SimpleNamespace(uuid="c6c5b7a4-36c3-4a8e-9b0c-3a1b0f6f9d10", name="shoes")
+IMAGE = SimpleNamespace(
+    uuid="4d1f2a4e-1b9a-4f7e-8a55-0d9b3c2e7f11", image_url="/media/1.jpg", product_id=1
+)
+
+
+def product(**fields):
+    values = dict(
+        uuid="0b8e6f5c-9a3d-4c2b-8e1f-7a6d5c4b3a21",
+        product_name="sneaker",
+        description="white",
+        current_price=19.99,
+        previous_price=24.5,
+        in_stock=3,
+        flash_sale=True,
+        category=CATEGORY,
+        images=[IMAGE],
+    )
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def same_json(data, model):
+    expected = orjson.loads(orjson.dumps(marshal(data, model)))
+    assert orjson.loads(orjson.dumps(compile_model(model)(data))) == expected
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        product(),
+        product(description=None, previous_price=None, flash_sale=None),
+        product(category=None, images=None),
+        product(images=[]),
+        product(current_price=20, in_stock="7", flash_sale="false"),
+        {"uuid": "0b8e6f5c-9a3d-4c2b-8e1f-7a6d5c4b3a21", "product_name": "dict"},
+        SimpleNamespace(),
+    ],
+)
+def test_product_matches_marshal(data):
+    same_json(data, product_model)
+
+
+def test_nested_lists_match_marshal():
+    same_json(
+        {"products": [product(), product(images=None)], "missing": ["x"]},
+        product_batch_model,
+    )
+    same_json({"products": None, "missing": None}, product_batch_model)
+
+
+def test_fallback_fields_match_marshal():
+    # Dates and renamed nested attributes keep the flask-restx formatting
+    order = SimpleNamespace(
+        uuid="a1b2c3d4-0000-4000-8000-000000000001",
+        quantity=2,
+        price=10.0,
+        status="paid",
+        created_at=datetime(2026, 1, 2, 3, 4, 5),
+        product={"product_uuid": "p", "product_name": "sneaker", "image_url": None},
+    )
+    same_json(
+        {"orders": [order], "has_more": False, "next_cursor": None}, order_history_model
+    )
+    same_json(
+        {
+            "day": date(2026, 1, 2),
+            "category": CATEGORY,
+            "orders": 1,
+            "units": 2,
+            "revenue": 3.5,
+        },
+        category_sales_model,
+    )
+
+
+def test_field_mask_matches_marshal(app):
+    view = serialize_with(product_model)(product)
+    mask = "product_name,category{name},images{uuid}"
+    with app.test_request_context(headers={"X-Fields": mask}):
+        assert view() == marshal(product(), product_model, mask=mask)
+
+    with app.test_request_context(headers={"X-Fields": "product_name{name}"}):
+        with pytest.raises(MaskError):
+            view()
+
+
+def test_field_mask_on_named_tuples(app, client):
+    with app.app_context():
+        make_category()
+    response = client.get("/api/categories/", headers={"X-Fields": "name"})
+    assert response.json == [{"name": "shoes"}]
@@ -0,0 +1,36 @@
+from exts import db
+
+from .conftest import login, make_user
+
+
+def profile(client, headers):
+    return client.get("/api/auth/profile", headers=headers).json["user"]
+
+
+def test_rejected_request_rolls_back_its_flushed_changes(app, client):
+    with app.app_context():
+        user = make_user()
+        make_user("taken@example.com", "taken")
+        headers = login(client, user)
+        db.session.remove()
+
+    # The email lookup autoflushes the new username before the 400
+    response = client.put(
+        "/api/auth/profile",
+        json={"username": "renamed", "email": "taken@example.com"},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert profile(client, headers)["username"] == "buyer"
+
+
+def test_successful_request_commits(app, client):
+    with app.app_context():
+        headers = login(client, make_user())
+        db.session.remove()
+
+    response = client.put(
+        "/api/auth/profile", json={"username": "renamed"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert profile(client, headers)["username"] == "renamed"
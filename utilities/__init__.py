@@ -1,3 +1,5 @@
+from .metrics import metrics
+from .query_profiler import query_profiler, QueryProfileError
 from .email_service import EmailService
 from .file_manager import (
     is_allowed_file,
@@ -6,3 +8,21 @@ from .file_manager import (
     ALLOWED_IMAGE_EXTENSIONS,
 )
 from .pagination_model import create_pagination_model
+from .pagination import paginate, total_cache
+from .serializers import compile_model, serialize, serialize_with
+from .json_provider import FastJSONProvider, output_json
+from .response_cache import ResponseCache, SingleFlight
+from .compression import compression, cache_response
+from .database import configure_engines, dispose_engines
+from .category_cache import category_cache, CachedCategory
+from .broadcaster import product_broadcaster
+from .event_bus import event_bus, ModelChange
+from .admission import admission, admission_priority
+from .deadline import (
+    deadlines,
+    request_deadline,
+    remaining,
+    check_deadline,
+    DeadlineExceeded,
+)
+from .idempotency import idempotency
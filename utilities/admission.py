@@ -0,0 +1,208 @@
+import heapq
+import itertools
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+
+from routing import is_read_request, view_method
+from .metrics import metrics
+
+# Priority classes, most important first
+PRIORITIES = ("critical", "normal", "low")
+# Share of the concurrency limit and of the wait queue each class may use, so
+# low priority requests are turned away while critical ones still get through
+CAPACITY_SHARE = {"critical": 1.0, "normal": 0.9, "low": 0.7}
+QUEUE_SHARE = {"critical": 1.0, "normal": 0.75, "low": 0.5}
+
+_UNSET = object()
+
+
+def admission_priority(level):
+    """Set the priority class of a resource method, None to skip admission"""
+
+    def decorator(func):
+        func.admission_priority = level
+        return func
+
+    return decorator
+
+
+def request_priority():
+    """Priority class of the current request, None when it is not limited"""
+    level = getattr(view_method(), "admission_priority", _UNSET)
+    if level is not _UNSET:
+        return level
+
+    for prefix, level in current_app.config["ADMISSION_ROUTE_PRIORITIES"].items():
+        if request.path.startswith(prefix):
+            return level
+    return "low" if is_read_request() else "normal"
+
+
+class Waiter:
+    def __init__(self, priority):
+        self.priority = priority
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class AdmissionController:
+    """
+    Per-worker concurrency limit with priority classes and a bounded wait queue.
+
+    At most ``ADMISSION_LIMIT`` requests run at once. Others wait, highest
+    priority first, for up to ``ADMISSION_QUEUE_TIMEOUT`` seconds in a queue of
+    ``ADMISSION_QUEUE_SIZE``. Each class only gets its share of both, so when
+    the worker saturates catalog reads get a 503 with ``Retry-After`` first,
+    then writes, and logins last. With ``ADMISSION_ADAPTIVE`` the limit follows
+    latency: it shrinks while requests run much slower than the best observed
+    window and grows back by one while they don't.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.limit = 0
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._inflight = 0
+        self._waiting = dict.fromkeys(PRIORITIES, 0)
+        self._window = [0, 0.0, 0]
+        self._baseline = None
+
+    def init_app(self, app):
+        app.config.setdefault("ADMISSION_LIMIT", 0)
+        app.config.setdefault("ADMISSION_QUEUE_SIZE", 16)
+        app.config.setdefault("ADMISSION_QUEUE_TIMEOUT", 2.0)
+        app.config.setdefault("ADMISSION_RETRY_AFTER", 1)
+        app.config.setdefault("ADMISSION_ROUTE_PRIORITIES", {})
+        app.config.setdefault("ADMISSION_ADAPTIVE", False)
+        app.config.setdefault("ADMISSION_MIN_LIMIT", 1)
+        app.config.setdefault("ADMISSION_WINDOW", 100)
+        app.config.setdefault("ADMISSION_LATENCY_TOLERANCE", 2.0)
+        if not app.config["ADMISSION_LIMIT"]:
+            return
+
+        self.app = app
+        self.limit = app.config["ADMISSION_LIMIT"]
+        app.extensions["admission"] = self
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+        metrics.counter("admission_rejected_total", "Requests shed by priority")
+        metrics.gauge("admission_inflight", "Requests holding an admission slot")
+        metrics.gauge("admission_queue_depth", "Requests waiting for a slot")
+        metrics.gauge("admission_limit", "Current concurrency limit")
+
+        @metrics.collector
+        def admission():
+            rows = [
+                ("admission_inflight", {}, self._inflight),
+                ("admission_limit", {}, self.limit),
+            ]
+            return rows + [
+                ("admission_queue_depth", {"priority": priority}, count)
+                for priority, count in self._waiting.items()
+            ]
+
+    # Slots
+
+    def _capacity(self, priority):
+        return max(1, int(self.limit * CAPACITY_SHARE[priority]))
+
+    def acquire(self, priority):
+        """Take a slot, waiting in the queue if needed; returns a reason on failure"""
+        rank = PRIORITIES.index(priority)
+        with self._lock:
+            ahead = sum(self._waiting[p] for p in PRIORITIES[: rank + 1])
+            if not ahead and self._inflight < self._capacity(priority):
+                self._inflight += 1
+                return None
+
+            queue_size = self.app.config["ADMISSION_QUEUE_SIZE"]
+            if sum(self._waiting.values()) >= queue_size * QUEUE_SHARE[priority]:
+                return "queue_full"
+            waiter = Waiter(priority)
+            heapq.heappush(self._waiters, (rank, next(self._sequence), waiter))
+            self._waiting[priority] += 1
+
+        waiter.event.wait(self.app.config["ADMISSION_QUEUE_TIMEOUT"])
+        with self._lock:
+            if waiter.granted:
+                return None
+            waiter.cancelled = True
+            self._waiting[priority] -= 1
+            return "timeout"
+
+    def release(self, elapsed):
+        with self._lock:
+            self._inflight -= 1
+            if self.app.config["ADMISSION_ADAPTIVE"]:
+                self._adapt(elapsed)
+            self._grant()
+
+    def _grant(self):
+        # Wake the best waiters that fit, a class that doesn't fit blocks the rest
+        while self._waiters:
+            rank, _, waiter = self._waiters[0]
+            if waiter.cancelled:
+                heapq.heappop(self._waiters)
+                continue
+            if self._inflight >= self._capacity(waiter.priority):
+                return
+            heapq.heappop(self._waiters)
+            self._waiting[waiter.priority] -= 1
+            self._inflight += 1
+            waiter.granted = True
+            waiter.event.set()
+
+    def _adapt(self, elapsed):
+        window = self._window
+        window[0] += 1
+        window[1] += elapsed
+        window[2] = max(window[2], self._inflight + 1)
+        if window[0] < self.app.config["ADMISSION_WINDOW"]:
+            return
+
+        latency = window[1] / window[0]
+        saturated = window[2] >= self.limit
+        self._window = [0, 0.0, 0]
+        # The best window seen, drifting up slowly so it follows the data
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline *= 1.01
+
+        config = self.app.config
+        if latency > self._baseline * config["ADMISSION_LATENCY_TOLERANCE"]:
+            self.limit = max(config["ADMISSION_MIN_LIMIT"], int(self.limit * 0.9))
+        elif saturated:
+            self.limit = min(config["ADMISSION_LIMIT"], self.limit + 1)
+
+    # Request hooks
+
+    def _admit(self):
+        priority = request_priority()
+        if priority is None:
+            return None
+
+        reason = self.acquire(priority)
+        if reason is None:
+            g.admission_start = time.perf_counter()
+            return None
+
+        metrics.inc("admission_rejected_total", priority=priority, reason=reason)
+        response = jsonify({"message": "Server is busy, please retry shortly"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(self.app.config["ADMISSION_RETRY_AFTER"])
+        return response
+
+    def _release(self, error=None):
+        start = g.pop("admission_start", None)
+        if start is not None:
+            self.release(time.perf_counter() - start)
+
+
+admission = AdmissionController()
@@ -0,0 +1,211 @@
+import queue
+import threading
+import time
+
+from sqlalchemy import func, or_, select
+
+from exts import db
+from models import Product, ProductChange
+
+# Fields pushed to stream subscribers
+LIVE_FIELDS = ("in_stock", "current_price", "flash_sale")
+
+
+class Subscription:
+    """Products and categories one stream client follows, with its event queue"""
+
+    def __init__(self, product_ids, category_ids, size):
+        self.product_ids = set(product_ids)
+        self.category_ids = set(category_ids)
+        self.queue = queue.Queue(maxsize=size)
+
+    def matches(self, product_id, category_id):
+        return product_id in self.product_ids or category_id in self.category_ids
+
+
+class ProductBroadcaster:
+    """
+    Per-worker fan-out of live product fields to Server-Sent Events streams.
+
+    While anyone is subscribed, one thread polls the product change log every
+    ``STREAM_INTERVAL`` seconds. Writes made by any worker land in that log, so
+    a single query per worker and interval serves every stream it holds.
+    Changes in an interval are coalesced into one batch per subscriber, and a
+    product is only pushed when one of :data:`LIVE_FIELDS` moved. A subscriber
+    whose queue fills up is sent a ``reset`` event and disconnected.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._thread = None
+        self._token = 0
+        self._last = {}
+
+    def init_app(self, app):
+        app.config.setdefault("STREAM_INTERVAL", 1.0)
+        app.config.setdefault("STREAM_HEARTBEAT", 15)
+        app.config.setdefault("STREAM_MAX_SECONDS", 300)
+        app.config.setdefault("STREAM_QUEUE_SIZE", 100)
+        app.extensions["product_broadcaster"] = self
+        self.app = app
+
+    # Subscriptions
+
+    def subscribe(self, product_ids, category_ids):
+        """Register a stream, starting the poller if it is the first one"""
+        subscription = Subscription(
+            product_ids, category_ids, self.app.config["STREAM_QUEUE_SIZE"]
+        )
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if self._thread is None or not self._thread.is_alive():
+                self._token = self._latest_token()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def snapshot(self, subscription):
+        """Current live fields of everything a subscription follows"""
+        rows = db.session.execute(
+            self._live_query().where(
+                or_(
+                    Product.id.in_(subscription.product_ids),
+                    Product.category_id.in_(subscription.category_ids),
+                )
+            )
+        ).all()
+        # The poller's last pushed values stay as they are: a change this
+        # snapshot already shows may still be due to the existing streams
+        return self._token, [self._event(row) for row in rows]
+
+    # Polling
+
+    @staticmethod
+    def _live_query():
+        return select(
+            Product.id,
+            Product.uuid,
+            Product.category_id,
+            *(getattr(Product, name) for name in LIVE_FIELDS),
+        )
+
+    @staticmethod
+    def _event(row):
+        return {"uuid": row.uuid, **{name: getattr(row, name) for name in LIVE_FIELDS}}
+
+    @staticmethod
+    def _latest_token():
+        return db.session.query(func.max(ProductChange.id)).scalar() or 0
+
+    def _run(self):
+        interval = self.app.config["STREAM_INTERVAL"]
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if not self._subscriptions:
+                    # Changes from here on go unseen, forget the values
+                    self._thread = None
+                    self._last.clear()
+                    return
+                subscriptions = list(self._subscriptions)
+
+            with self.app.app_context():
+                try:
+                    updates = self._poll()
+                except Exception:
+                    self.app.logger.exception("Product broadcaster poll failed")
+                    continue
+                finally:
+                    db.session.remove()
+            if updates:
+                self._publish(subscriptions, updates)
+
+    def _poll(self):
+        """Changed live fields since the last poll, one entry per product"""
+        changes = db.session.execute(
+            select(
+                ProductChange.id,
+                ProductChange.product_id,
+                ProductChange.product_uuid,
+                ProductChange.deleted,
+            )
+            .where(ProductChange.id > self._token)
+            .order_by(ProductChange.id)
+            .limit(10000)
+        ).all()
+        if not changes:
+            return []
+        self._token = changes[-1].id
+
+        latest = {change.product_id: change for change in changes}
+        rows = db.session.execute(
+            self._live_query().where(
+                Product.id.in_(
+                    [id for id, change in latest.items() if not change.deleted]
+                )
+            )
+        ).all()
+
+        # Only the poller thread touches _last, the values it last pushed
+        updates = []
+        for row in rows:
+            values = tuple(getattr(row, name) for name in LIVE_FIELDS)
+            previous = self._last.get(row.id)
+            self._last[row.id] = (row.category_id, values)
+            if previous is None or previous[1] != values:
+                updates.append((row.id, row.category_id, self._event(row)))
+
+        for id, change in latest.items():
+            if change.deleted:
+                category_id = self._last.pop(id, (None,))[0]
+                updates.append(
+                    (id, category_id, {"uuid": change.product_uuid, "deleted": True})
+                )
+        return updates
+
+    def _publish(self, subscriptions, updates):
+        for subscription in subscriptions:
+            events = [
+                event
+                for product_id, category_id, event in updates
+                if subscription.matches(product_id, category_id)
+            ]
+            if not events:
+                continue
+            try:
+                subscription.queue.put_nowait((self._token, events))
+            except queue.Full:
+                # The client is too slow, tell it to resync and let it go
+                self.unsubscribe(subscription)
+                with subscription.queue.mutex:
+                    subscription.queue.queue.clear()
+                subscription.queue.put_nowait((self._token, None))
+
+    # Streaming
+
+    def stream(self, subscription, dumps):
+        """Server-Sent Events for a subscription, to wrap in a streamed response"""
+        heartbeat = self.app.config["STREAM_HEARTBEAT"]
+        deadline = time.monotonic() + self.app.config["STREAM_MAX_SECONDS"]
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    token, events = subscription.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if events is None:
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+                yield f"id: {token}\nevent: update\ndata: {dumps(events)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+
+product_broadcaster = ProductBroadcaster()
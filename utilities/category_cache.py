@@ -0,0 +1,119 @@
+import threading
+from collections import namedtuple
+from itertools import chain
+
+from flask import g, has_request_context
+from sqlalchemy import event, select, update
+
+from exts import db
+from models import CacheVersion, Category, normalize_uuid
+from routing import use_primary
+
+VERSION_NAME = "categories"
+
+CachedCategory = namedtuple("CachedCategory", ["id", "uuid", "name"])
+
+
+class CategoryCache:
+    """
+    Per-worker index of all categories by uuid and name.
+
+    Every flush that touches a category bumps the ``categories`` row of
+    ``cache_version`` in the same transaction. A request reads that row once,
+    before its first lookup, and the index is reloaded when the version moved,
+    so a committed change is seen by every worker on its next request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._categories = ()
+        self._by_uuid = {}
+        self._by_name = {}
+
+    def init_app(self, app):
+        app.extensions["category_cache"] = self
+        if not event.contains(db.session, "before_flush", self._bump_version):
+            event.listen(db.session, "before_flush", self._bump_version)
+            event.listen(db.session, "after_commit", self._end_transaction)
+            event.listen(db.session, "after_rollback", self._end_transaction)
+
+    # Lookups
+
+    def get(self, uuid):
+        """Category with this uuid in any spelling, or None"""
+        self._validate()
+        return self._by_uuid.get(normalize_uuid(uuid))
+
+    def by_name(self, name):
+        """Category with this name, or None"""
+        self._validate()
+        return self._by_name.get(name)
+
+    def all(self):
+        """Every category, ordered by id"""
+        self._validate()
+        return list(self._categories)
+
+    def invalidate(self):
+        self._version = None
+
+    # Loading
+
+    def _validate(self):
+        if has_request_context() and g.get("category_cache_checked"):
+            return
+
+        # Version and rows must come from the same database
+        with use_primary():
+            version = (
+                db.session.execute(
+                    select(CacheVersion.version).where(
+                        CacheVersion.name == VERSION_NAME
+                    )
+                ).scalar()
+                or 0
+            )
+            if version != self._version:
+                with self._lock:
+                    if version != self._version:
+                        self._load(version)
+
+        if has_request_context():
+            g.category_cache_checked = True
+
+    def _load(self, version):
+        # Rows are read after the version, so they are never older than it
+        rows = db.session.execute(
+            select(Category.id, Category.uuid, Category.name).order_by(Category.id)
+        )
+        categories = tuple(CachedCategory(*row) for row in rows)
+        self._by_uuid = {category.uuid: category for category in categories}
+        self._by_name = {category.name: category for category in categories}
+        self._categories = categories
+        self._version = version
+
+    # Invalidation
+
+    @staticmethod
+    def _bump_version(session, flush_context, instances):
+        changed = chain(session.new, session.dirty, session.deleted)
+        if not any(isinstance(obj, Category) for obj in changed):
+            return
+
+        session.info["category_cache_bumped"] = True
+        result = session.execute(
+            update(CacheVersion.__table__)
+            .where(CacheVersion.name == VERSION_NAME)
+            .values(version=CacheVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            session.add(CacheVersion(name=VERSION_NAME, version=1))
+
+    def _end_transaction(self, session):
+        # Drop what this worker may have loaded from the uncommitted transaction
+        if session.info.pop("category_cache_bumped", False):
+            self.invalidate()
+
+
+category_cache = CategoryCache()
@@ -0,0 +1,286 @@
+import zlib
+
+from flask import current_app, g, request
+
+from models import Category, Product, ProductImage
+from .event_bus import event_bus
+from .response_cache import ResponseCache, SingleFlight
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/css",
+    "text/event-stream",
+    "text/html",
+    "text/plain",
+}
+
+
+class _GzipStream:
+    """Incremental gzip compressor"""
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    """Incremental brotli compressor"""
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    """Incremental zstandard compressor"""
+
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def _gzip(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def _zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def available_encodings():
+    """Return the supported content codings in order of preference"""
+    encodings = {}
+    if brotli is not None:
+        encodings["br"] = (_brotli, _BrotliStream, "COMPRESS_BR_LEVEL")
+    if zstandard is not None:
+        encodings["zstd"] = (_zstd, _ZstdStream, "COMPRESS_ZSTD_LEVEL")
+    encodings["gzip"] = (_gzip, _GzipStream, "COMPRESS_LEVEL")
+    return encodings
+
+
+def cache_response(func):
+    """Mark a GET resource method as safe to serve from the response cache"""
+    func.cache_response = True
+    return func
+
+
+class ResponseCompression:
+    """
+    Negotiated response compression with a cache of encoded catalog bodies.
+
+    Responses are compressed with the best coding the client accepts (brotli and
+    zstd when installed, gzip otherwise) once they reach ``COMPRESS_MIN_SIZE``.
+    Streamed responses are compressed chunk by chunk and flushed as they go.
+
+    GET methods marked with :func:`cache_response` have their final encoded body
+    stored per path and coding, so repeated hits skip both the view (and its
+    serialization) and the compression. The cache is cleared once a transaction
+    writing models commits, never before; other workers catch up within
+    ``COMPRESS_CACHE_TTL``.
+
+    Concurrent misses on one key are coalesced: the first runs the view while
+    the others wait up to ``COMPRESS_CACHE_COALESCE_TIMEOUT`` seconds and are
+    then served what it stored. When it stored nothing (an error, or a write
+    cleared the cache meanwhile) they run the view themselves.
+    """
+
+    def __init__(self, app=None):
+        self.encodings = available_encodings()
+        self.cache = None
+        self.flights = SingleFlight()
+        # Models behind the cached catalog responses
+        event_bus.subscribe(models=(Product, Category, ProductImage))(self._invalidate)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+        app.config.setdefault("COMPRESS_LEVEL", 6)
+        app.config.setdefault("COMPRESS_BR_LEVEL", 4)
+        app.config.setdefault("COMPRESS_ZSTD_LEVEL", 3)
+        app.config.setdefault("COMPRESS_CACHE_TTL", 30)
+        app.config.setdefault("COMPRESS_CACHE_MAX_ENTRIES", 512)
+        app.config.setdefault("COMPRESS_CACHE_COALESCE_TIMEOUT", 5)
+
+        self.cache = ResponseCache(
+            max_entries=app.config["COMPRESS_CACHE_MAX_ENTRIES"],
+            ttl=app.config["COMPRESS_CACHE_TTL"],
+        )
+        app.extensions["compression"] = self
+        app.before_request(self.serve_cached)
+        app.after_request(self.process_response)
+        app.teardown_request(self._land)
+
+    def negotiate(self):
+        """Pick the content coding for the current request"""
+        return request.accept_encodings.best_match(list(self.encodings))
+
+    def is_cacheable(self):
+        """Check if the current request targets a cacheable GET method"""
+        if request.method != "GET":
+            return False
+        view = current_app.view_functions.get(request.endpoint)
+        view_class = getattr(view, "view_class", None)
+        # Resource methods carry the mark, plain function views carry it directly
+        method = getattr(view_class, "get", None) if view_class else view
+        return bool(getattr(method, "cache_response", False))
+
+    def cache_key(self, encoding):
+        mask = request.headers.get(current_app.config.get("RESTX_MASK_HEADER", ""))
+        return (request.full_path, mask, encoding)
+
+    def serve_cached(self):
+        """Short-circuit cacheable requests with a stored encoded response"""
+        if not self.is_cacheable():
+            return None
+
+        key = self.cache_key(self.negotiate())
+        entry = self.cache.get(key) or self._coalesce(key)
+        if entry is None:
+            # A write clearing the cache while the view runs voids its result
+            g.response_cache_generation = self.cache.generation
+            return None
+
+        status, headers, body = entry
+        response = current_app.response_class(body, status=status, headers=headers)
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+    def _coalesce(self, key):
+        """Wait for a concurrent miss on the same key to fill the cache"""
+        timeout = current_app.config["COMPRESS_CACHE_COALESCE_TIMEOUT"]
+        if timeout <= 0 or self.cache.ttl <= 0:
+            return None
+        flight = self.flights.lead(key)
+        if flight is None:
+            g.response_cache_flight = key
+            return None
+
+        if not flight.wait(timeout):
+            return None
+        return self.cache.get(key)
+
+    def _land(self, error=None):
+        # The leader's response is cached by now, or never will be
+        key = g.pop("response_cache_flight", None)
+        if key is not None:
+            self.flights.land(key)
+
+    def _invalidate(self, changes):
+        # Runs after commit, so a GET refilling the cache reads the new rows
+        if self.cache is not None:
+            self.cache.clear()
+
+    def process_response(self, response):
+        if response.headers.get("X-Cache") == "HIT":
+            return response
+
+        encoding = self.negotiate()
+        if self.should_compress(response):
+            response.vary.add("Accept-Encoding")
+            if encoding is not None:
+                self.compress(response, encoding)
+
+        if (
+            response.status_code == 200
+            and not response.is_streamed
+            and self.is_cacheable()
+        ):
+            headers = [
+                (name, value)
+                for name, value in response.headers
+                if name not in ("Content-Length", "Set-Cookie")
+            ]
+            body = response.get_data()
+            self.cache.set(
+                self.cache_key(encoding),
+                (response.status_code, headers, body),
+                generation=g.get("response_cache_generation"),
+            )
+            response.headers["X-Cache"] = "MISS"
+
+        return response
+
+    def should_compress(self, response):
+        if response.direct_passthrough or "Content-Encoding" in response.headers:
+            return False
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return False
+        if "no-transform" in response.headers.get("Cache-Control", ""):
+            return False
+        if response.is_streamed:
+            return True
+        return response.content_length is None or (
+            response.content_length >= current_app.config["COMPRESS_MIN_SIZE"]
+        )
+
+    def compress(self, response, encoding):
+        """Encode the response body in place"""
+        compress, stream, level_key = self.encodings[encoding]
+        level = current_app.config[level_key]
+
+        if response.is_streamed:
+            response.response = self._stream(response.response, stream(level))
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+                return
+            response.set_data(compress(data, level))
+
+        response.headers["Content-Encoding"] = encoding
+
+    @staticmethod
+    def _stream(chunks, compressor):
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                if chunk:
+                    yield compressor.compress(chunk)
+            yield compressor.finish()
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+
+compression = ResponseCompression()
@@ -0,0 +1,33 @@
+from sqlalchemy import event
+
+from exts import db
+
+
+def _set_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return on_connect
+
+
+def configure_engines(app):
+    """Apply ``SQLITE_PRAGMAS`` to every SQLite engine of the app"""
+    pragmas = app.config.get("SQLITE_PRAGMAS")
+    if not pragmas:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", _set_pragmas(pragmas))
+
+
+def dispose_engines(app):
+    """Drop pooled connections inherited from a parent process after a fork"""
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False leaves the parent's connections open for the parent
+            engine.dispose(close=False)
@@ -0,0 +1,158 @@
+import time
+
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from werkzeug.exceptions import ServiceUnavailable
+
+from routing import view_method
+from .metrics import metrics
+
+_UNSET = object()
+
+
+class DeadlineExceeded(ServiceUnavailable):
+    """Raised when the current request has used up its time budget"""
+
+    description = "The request took too long, please retry"
+
+
+def request_deadline(seconds):
+    """Set the time budget of a resource method in seconds, None for no deadline"""
+
+    def decorator(func):
+        func.request_deadline = seconds
+        return func
+
+    return decorator
+
+
+def remaining():
+    """Seconds left before the current request's deadline, None without one"""
+    if not has_request_context():
+        return None
+    deadline = g.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline():
+    """Raise :class:`DeadlineExceeded` once the current request is out of time"""
+    left = remaining()
+    if left is not None and left <= 0:
+        g.deadline_exceeded = True
+        raise DeadlineExceeded()
+
+
+class Deadlines:
+    """
+    Per-request time budgets, enforced down to the database.
+
+    Each request gets ``REQUEST_DEADLINE`` seconds, or what its resource method
+    sets with :func:`request_deadline`. Every SQL statement is bounded by the
+    time left: Postgres through ``SET LOCAL statement_timeout``, set once per
+    transaction and lowered when the time left falls below half of it, and
+    SQLite through a progress handler that interrupts the query. A request
+    that runs out of time answers 503 even where an endpoint catches the
+    error, and is counted in ``request_deadline_exceeded_total``. The budget
+    covers the handler only; the unit of work still commits once it returned
+    in time.
+    """
+
+    def init_app(self, app):
+        from exts import db
+
+        app.config.setdefault("REQUEST_DEADLINE", 0)
+        app.config.setdefault("SQLITE_PROGRESS_STEPS", 1000)
+        if not app.config["REQUEST_DEADLINE"]:
+            return
+
+        metrics.counter(
+            "request_deadline_exceeded_total", "Requests aborted at their deadline"
+        )
+        app.extensions["deadlines"] = self
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "begin", self._begin)
+                event.listen(engine, "before_cursor_execute", self._before_cursor)
+                event.listen(engine, "after_cursor_execute", self._after_cursor)
+                event.listen(engine, "handle_error", self._handle_error)
+
+    # Request hooks
+
+    @staticmethod
+    def _start():
+        seconds = getattr(view_method(), "request_deadline", _UNSET)
+        if seconds is _UNSET:
+            seconds = current_app.config["REQUEST_DEADLINE"]
+        if seconds:
+            g.deadline = time.monotonic() + seconds
+
+    @staticmethod
+    def _finish(response):
+        # Runs before the unit of work commits, which is not held to the budget
+        g.pop("deadline", None)
+        if not g.pop("deadline_exceeded", False):
+            return response
+
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        metrics.inc("request_deadline_exceeded_total", route=route)
+        if response.status_code != 503:
+            # The endpoint swallowed the error, answer as if it hadn't
+            response = jsonify({"message": DeadlineExceeded.description})
+            response.status_code = 503
+        return response
+
+    # Statement timeouts
+
+    @staticmethod
+    def _begin(conn):
+        # SET LOCAL ends with the transaction, conn.info outlives it
+        conn.info.pop("statement_timeout", None)
+
+    @staticmethod
+    def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+        left = remaining()
+        if left is None:
+            return
+        if left <= 0:
+            g.deadline_exceeded = True
+            raise DeadlineExceeded()
+
+        if conn.dialect.name == "sqlite":
+            deadline = g.deadline
+            conn.connection.driver_connection.set_progress_handler(
+                lambda: time.monotonic() > deadline,
+                current_app.config["SQLITE_PROGRESS_STEPS"],
+            )
+            conn.info["deadline_handler"] = True
+        elif conn.dialect.name == "postgresql" and not getattr(cursor, "name", None):
+            # Named cursors stream results and can't run other statements
+            timeout = max(1, int(left * 1000))
+            current = conn.info.get("statement_timeout")
+            if current and timeout * 2 > current:
+                return
+            cursor.execute(f"SET LOCAL statement_timeout = {timeout}")
+            conn.info["statement_timeout"] = timeout
+
+    @staticmethod
+    def _clear_handler(conn):
+        if conn is not None and conn.info.pop("deadline_handler", False):
+            conn.connection.driver_connection.set_progress_handler(None, 0)
+
+    def _after_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        self._clear_handler(conn)
+
+    def _handle_error(self, context):
+        self._clear_handler(context.connection)
+        left = remaining()
+        if left is not None and left <= 0:
+            # The interrupted or cancelled statement is the deadline's doing
+            g.deadline_exceeded = True
+            raise DeadlineExceeded() from context.original_exception
+
+
+deadlines = Deadlines()
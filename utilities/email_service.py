@@ -3,6 +3,7 @@ from threading import Thread
 from flask_mail import Message
 
 from exts import mail
+from .metrics import metrics
 
 
 class EmailService:
@@ -10,8 +11,14 @@ class EmailService:
 
     @staticmethod
     def send_async_email(app, msg):
-        with app.app_context():
-            mail.send(msg)
+        outcome = "failed"
+        try:
+            with app.app_context():
+                mail.send(msg)
+            outcome = "sent"
+        finally:
+            metrics.inc("email_queue_depth", -1)
+            metrics.inc("emails_sent_total", outcome=outcome)
 
     @staticmethod
     def send_mail(subject, recipients, body, html=None, sender=None):
@@ -24,6 +31,7 @@ class EmailService:
             body=body,
             html=html,
         )
+        metrics.inc("email_queue_depth")
         Thread(target=EmailService.send_async_email, args=(app, msg)).start()
 
     @staticmethod
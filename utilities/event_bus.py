@@ -0,0 +1,181 @@
+import queue
+import threading
+from collections import namedtuple
+
+from sqlalchemy import event, inspect
+
+from exts import db
+from models import Base
+from .metrics import metrics
+
+ModelChange = namedtuple("ModelChange", ["model", "action", "id", "values", "changed"])
+ModelChange.__doc__ = """
+One row written in a committed transaction.
+
+``action`` is ``created``, ``updated`` or ``deleted``, ``values`` holds the
+column values as flushed and ``changed`` the attributes an update touched.
+"""
+
+CREATED, UPDATED, DELETED = "created", "updated", "deleted"
+
+
+def _values(state):
+    return {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict
+    }
+
+
+def _merge(previous, change):
+    """Fold two changes of the same row in one transaction"""
+    if previous is None:
+        return change
+    if change.action == DELETED:
+        # A row created and deleted in one transaction never existed outside it
+        return None if previous.action == CREATED else change
+    return previous._replace(
+        values=change.values, changed=previous.changed | change.changed
+    )
+
+
+class Subscriber:
+    def __init__(self, func, models, background, queue_size):
+        self.func = func
+        self.name = func.__name__
+        self.models = tuple(models) if models else None
+        self.background = background
+        self.queue_size = queue_size
+        self.queue = None
+        self.thread = None
+
+    def wants(self, change):
+        return self.models is None or issubclass(change.model, self.models)
+
+
+class EventBus:
+    """
+    After-commit dispatch of model changes to in-process subscribers.
+
+    Rows flushed by the session are collected per transaction, with repeated
+    writes to the same row folded together, and handed to subscribers as one
+    batch once the transaction commits. Rolled back transactions publish
+    nothing. Synchronous subscribers run in the committing thread, background
+    ones get their own thread and a queue of ``EVENT_BUS_QUEUE_SIZE`` batches;
+    batches that don't fit are dropped and counted.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("EVENT_BUS_QUEUE_SIZE", 1000)
+        app.extensions["event_bus"] = self
+        self.app = app
+        metrics.counter("event_bus_dropped_total", "Event batches dropped")
+        if not event.contains(db.session, "after_flush", self._collect):
+            event.listen(db.session, "after_flush", self._collect)
+            event.listen(db.session, "after_commit", self._publish_session)
+            event.listen(db.session, "after_rollback", self._discard)
+
+    def subscribe(self, models=None, background=False, queue_size=None):
+        """Register a callable receiving lists of :class:`ModelChange`"""
+
+        def decorator(func):
+            self._subscribers.append(Subscriber(func, models, background, queue_size))
+            return func
+
+        return decorator
+
+    # Collection
+
+    @staticmethod
+    def _collect(session, flush_context):
+        pending = session.info.setdefault("model_changes", {})
+        for objects, action in (
+            (session.new, CREATED),
+            (session.dirty, UPDATED),
+            (session.deleted, DELETED),
+        ):
+            for obj in objects:
+                if not isinstance(obj, Base):
+                    continue
+                state = inspect(obj)
+                changed = frozenset(
+                    attr.key for attr in state.attrs if attr.history.has_changes()
+                )
+                if action == UPDATED and not changed:
+                    continue
+                key = (type(obj), obj.id)
+                change = ModelChange(type(obj), action, obj.id, _values(state), changed)
+                merged = _merge(pending.get(key), change)
+                if merged is None:
+                    pending.pop(key, None)
+                else:
+                    pending[key] = merged
+
+    @staticmethod
+    def _discard(session):
+        session.info.pop("model_changes", None)
+
+    def _publish_session(self, session):
+        changes = session.info.pop("model_changes", None)
+        if changes:
+            self.publish(list(changes.values()))
+
+    # Dispatch
+
+    def publish(self, changes):
+        """Hand a batch of changes to every interested subscriber"""
+        for subscriber in self._subscribers:
+            batch = [change for change in changes if subscriber.wants(change)]
+            if not batch:
+                continue
+            if not subscriber.background:
+                self._call(subscriber, batch)
+                continue
+
+            self._start(subscriber)
+            try:
+                subscriber.queue.put_nowait(batch)
+            except queue.Full:
+                metrics.inc("event_bus_dropped_total", subscriber=subscriber.name)
+                if self.app:
+                    self.app.logger.warning(
+                        "Event bus queue of %s is full, dropped %d changes",
+                        subscriber.name,
+                        len(batch),
+                    )
+
+    def _call(self, subscriber, batch):
+        try:
+            subscriber.func(batch)
+        except Exception:
+            if self.app:
+                self.app.logger.exception("Event subscriber %s failed", subscriber.name)
+
+    def _start(self, subscriber):
+        with self._lock:
+            if subscriber.queue is None:
+                size = subscriber.queue_size or self.app.config["EVENT_BUS_QUEUE_SIZE"]
+                subscriber.queue = queue.Queue(maxsize=size)
+            if subscriber.thread is None or not subscriber.thread.is_alive():
+                subscriber.thread = threading.Thread(
+                    target=self._consume, args=(subscriber,), daemon=True
+                )
+                subscriber.thread.start()
+
+    def _consume(self, subscriber):
+        while True:
+            batch = subscriber.queue.get()
+            with self.app.app_context():
+                try:
+                    self._call(subscriber, batch)
+                finally:
+                    db.session.remove()
+            subscriber.queue.task_done()
+
+
+event_bus = EventBus()
@@ -1,6 +1,8 @@
 import os
 from werkzeug.utils import secure_filename
 
+from .deadline import check_deadline
+
 
 # Allowed file extensions
 ALLOWED_IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
@@ -14,6 +16,7 @@ def is_allowed_file(filename, allowed_extensions):
 
 def save_file(file, upload_folder, allowed_extensions):
     """Save uploaded file to specified folder"""
+    check_deadline()
     try:
         if not file or file.filename == "":
             return None
@@ -0,0 +1,237 @@
+import hashlib
+import itertools
+import time
+from datetime import datetime, timedelta
+
+import orjson
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from exts import db
+from models import IdempotencyRecord
+from .metrics import metrics
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH"}
+# Response headers stored and replayed with the body. Bodies are stored before
+# compression, which encodes a replay for the retry like any other response
+REPLAYED_HEADERS = ("Content-Type", "Location")
+
+
+def _error(message, status, **headers):
+    response = jsonify({"message": message})
+    response.status_code = status
+    response.headers.update(headers)
+    return response
+
+
+class Idempotency:
+    """
+    ``Idempotency-Key`` support for POST, PUT and PATCH requests.
+
+    The first request with a key claims a record keyed by the caller's
+    identity and the key, remembering a hash of the request. Its response is
+    stored once the unit of work has committed, and retries within
+    ``IDEMPOTENCY_TTL`` get it back without running the view again. A retry
+    arriving while the first request still runs polls the record for up to
+    ``IDEMPOTENCY_WAIT`` seconds rather than racing it. Reusing a key for a
+    different request is a 422. Server errors are not stored, so their
+    retries run again, and a claim left by a crashed worker is taken over
+    after ``IDEMPOTENCY_LOCK_TIMEOUT`` seconds.
+    """
+
+    def __init__(self):
+        self._last_purge = 0
+
+    def init_app(self, app):
+        app.config.setdefault("IDEMPOTENCY_TTL", 86400)
+        app.config.setdefault("IDEMPOTENCY_WAIT", 10)
+        app.config.setdefault("IDEMPOTENCY_LOCK_TIMEOUT", 60)
+        app.config.setdefault("IDEMPOTENCY_POLL_INTERVAL", 0.05)
+        app.config.setdefault("IDEMPOTENCY_PURGE_INTERVAL", 300)
+
+        metrics.counter(
+            "idempotency_requests_total", "Requests with an Idempotency-Key by outcome"
+        )
+        app.extensions["idempotency"] = self
+        app.before_request(self._begin)
+        app.after_request(self._finish)
+        app.teardown_request(self._abandon)
+
+    # Request fingerprint
+
+    @staticmethod
+    def _identity():
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            # The view rejects bad tokens itself
+            identity = None
+        return "anonymous" if identity is None else f"user:{identity}"
+
+    @staticmethod
+    def _request_hash():
+        digest = hashlib.sha256(f"{request.method} {request.full_path}\n".encode())
+        if request.mimetype.startswith("multipart/"):
+            # Boundaries change from one retry to the next, hash the parts
+            for name, value in sorted(request.form.items(multi=True)):
+                digest.update(f"{name}={value}\n".encode())
+            files = sorted(
+                request.files.items(multi=True),
+                key=lambda item: (item[0], item[1].filename or ""),
+            )
+            for name, file in files:
+                digest.update(f"{name}:{file.filename}\n".encode())
+                digest.update(file.stream.read())
+                file.stream.seek(0)
+        else:
+            digest.update(request.get_data(cache=True))
+        return digest.hexdigest()
+
+    # Records
+
+    def _claim(self, key, request_hash):
+        """Insert a pending record, or return the record already holding the key"""
+        now = datetime.utcnow()
+        config = current_app.config
+        if time.monotonic() - self._last_purge > config["IDEMPOTENCY_PURGE_INTERVAL"]:
+            self._last_purge = time.monotonic()
+            with db.engine.begin() as conn:
+                conn.execute(
+                    delete(IdempotencyRecord).where(IdempotencyRecord.expires_at < now)
+                )
+
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    insert(IdempotencyRecord).values(
+                        key=key,
+                        request_hash=request_hash,
+                        created_at=now,
+                        expires_at=now + timedelta(seconds=config["IDEMPOTENCY_TTL"]),
+                    )
+                )
+            return None
+        except IntegrityError:
+            with db.engine.connect() as conn:
+                return conn.execute(
+                    select(IdempotencyRecord.__table__).where(
+                        IdempotencyRecord.key == key
+                    )
+                ).first()
+
+    @staticmethod
+    def _delete(key, *criteria):
+        with db.engine.begin() as conn:
+            conn.execute(
+                delete(IdempotencyRecord).where(IdempotencyRecord.key == key, *criteria)
+            )
+
+    @staticmethod
+    def _replay(record):
+        response = current_app.response_class(record.body, status=record.status_code)
+        for name, value in orjson.loads(record.headers):
+            response.headers[name] = value
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    # Request hooks
+
+    def _begin(self):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or request.method not in IDEMPOTENT_METHODS:
+            return None
+        if len(key) > 255:
+            return _error(f"{IDEMPOTENCY_HEADER} is longer than 255 characters", 400)
+
+        config = current_app.config
+        key = hashlib.sha256(f"{self._identity()}\0{key}".encode()).hexdigest()
+        request_hash = self._request_hash()
+        give_up = time.monotonic() + config["IDEMPOTENCY_WAIT"]
+        for attempt in itertools.count():
+            if attempt:
+                # Polling repeats one query on purpose, it is not an N+1
+                g.pop("query_profile", None)
+            record = self._claim(key, request_hash)
+            if record is None:
+                g.idempotency_key = key
+                metrics.inc("idempotency_requests_total", outcome="new")
+                return None
+
+            now = datetime.utcnow()
+            if record.expires_at <= now:
+                self._delete(key, IdempotencyRecord.expires_at == record.expires_at)
+                continue
+
+            if record.request_hash != request_hash:
+                metrics.inc("idempotency_requests_total", outcome="mismatch")
+                return _error(
+                    f"{IDEMPOTENCY_HEADER} was already used for a different request",
+                    422,
+                )
+
+            if record.status_code is not None:
+                metrics.inc("idempotency_requests_total", outcome="replayed")
+                return self._replay(record)
+
+            lock_timeout = timedelta(seconds=config["IDEMPOTENCY_LOCK_TIMEOUT"])
+            if record.created_at < now - lock_timeout:
+                # The worker running the first request died, run it again
+                self._delete(
+                    key,
+                    IdempotencyRecord.created_at == record.created_at,
+                    IdempotencyRecord.status_code.is_(None),
+                )
+                continue
+
+            if time.monotonic() >= give_up:
+                metrics.inc("idempotency_requests_total", outcome="in_progress")
+                return _error(
+                    "A request with this Idempotency-Key is still running",
+                    409,
+                    **{"Retry-After": "1"},
+                )
+            time.sleep(config["IDEMPOTENCY_POLL_INTERVAL"])
+
+    def _finish(self, response):
+        # Runs after the unit of work committed what the response reports
+        key = g.pop("idempotency_key", None)
+        if key is None:
+            return response
+
+        if (
+            response.status_code >= 500
+            or response.is_streamed
+            or response.direct_passthrough
+        ):
+            self._delete(key, IdempotencyRecord.status_code.is_(None))
+            return response
+
+        headers = [
+            (name, value)
+            for name, value in response.headers
+            if name in REPLAYED_HEADERS
+        ]
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(IdempotencyRecord)
+                .where(IdempotencyRecord.key == key)
+                .values(
+                    status_code=response.status_code,
+                    headers=orjson.dumps(headers).decode(),
+                    body=response.get_data(),
+                )
+            )
+        return response
+
+    def _abandon(self, error=None):
+        # The request failed before storing a response, let a retry run it
+        key = g.pop("idempotency_key", None)
+        if key is not None:
+            self._delete(key, IdempotencyRecord.status_code.is_(None))
+
+
+idempotency = Idempotency()
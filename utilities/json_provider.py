@@ -0,0 +1,65 @@
+import json
+
+from flask import current_app, make_response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, falling back to the stdlib json module"""
+
+    def _options(self, **kwargs):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            options |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialize data to JSON bytes"""
+        if orjson is None:
+            return self.dumps(obj, **kwargs).encode("utf-8")
+        return orjson.dumps(obj, default=self.default, option=self._options(**kwargs))
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, **kwargs).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {}
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args["indent"] = 2
+        return self._app.response_class(
+            self.dumps_bytes(obj, **dump_args) + b"\n", mimetype=self.mimetype
+        )
+
+
+def output_json(data, code, headers=None):
+    """flask-restx representation that encodes through the app JSON provider"""
+    settings = current_app.config.get("RESTX_JSON", {})
+    provider = current_app.json
+
+    if hasattr(provider, "dumps_bytes"):
+        indent = 4 if current_app.debug else settings.get("indent")
+        dumped = provider.dumps_bytes(data, sort_keys=False, indent=indent) + b"\n"
+    else:
+        if current_app.debug:
+            settings.setdefault("indent", 4)
+        dumped = json.dumps(data, **settings) + "\n"
+
+    resp = make_response(dumped, code)
+    resp.headers.extend(headers or {})
+    resp.mimetype = "application/json"
+    return resp
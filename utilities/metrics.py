@@ -0,0 +1,338 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Metrics:
+    """
+    A small Prometheus-style metrics registry.
+
+    Every thread writes to its own shard of plain dicts, so recording a value
+    never takes a lock; shards are summed when metrics are scraped. With
+    ``METRICS_MULTIPROC_DIR`` set, each worker also writes a snapshot file and
+    ``/metrics`` merges the snapshots of all workers. Gauges from workers that
+    are no longer running are dropped, counters and histograms are kept.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._shards_lock = threading.Lock()
+        self._meta = {}
+        self._collectors = {}
+        self.directory = None
+        self.flush_interval = 5
+        self._last_flush = 0
+
+        self.histogram(
+            "http_request_duration_seconds", "Request latency by namespace and route"
+        )
+        self.counter("http_requests_total", "Requests by namespace, route and status")
+        self.histogram(
+            "http_request_db_statements",
+            "SQL statements issued per request",
+            buckets=STATEMENT_BUCKETS,
+        )
+        self.histogram("http_request_db_seconds", "Time spent in SQL per request")
+        self.gauge("email_queue_depth", "Emails waiting to be sent")
+        self.counter("emails_sent_total", "Emails sent by outcome")
+        self.counter("response_cache_hits_total", "Response cache hits")
+        self.counter("response_cache_misses_total", "Response cache misses")
+        self.gauge("response_cache_entries", "Entries in the response cache")
+        self.counter(
+            "response_cache_coalesced_total",
+            "Cache misses that waited for an identical request in flight",
+        )
+
+    # Registration
+
+    def counter(self, name, description):
+        self._meta[name] = ("counter", description, None)
+
+    def gauge(self, name, description):
+        self._meta[name] = ("gauge", description, None)
+
+    def histogram(self, name, description, buckets=DEFAULT_BUCKETS):
+        self._meta[name] = ("histogram", description, tuple(buckets))
+
+    def collector(self, func):
+        """Register a callable returning (name, labels, value) rows at scrape time"""
+        self._collectors[func.__name__] = func
+        return func
+
+    # Recording
+
+    def _shard(self):
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def inc(self, name, amount=1, **labels):
+        """Increment a counter, or move a gauge up or down"""
+        shard = self._shard()
+        key = (name, tuple(labels.items()), None)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record a value in a histogram"""
+        shard = self._shard()
+        labels = tuple(labels.items())
+        bucket = (name, labels, bisect_left(self._meta[name][2], value))
+        shard[bucket] = shard.get(bucket, 0) + 1
+        key = (name, labels, "sum")
+        shard[key] = shard.get(key, 0) + value
+        key = (name, labels, "count")
+        shard[key] = shard.get(key, 0) + 1
+
+    # Collection
+
+    def snapshot(self):
+        """Sum every thread shard, folding shards of finished threads"""
+        totals = {}
+        with self._shards_lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    for key, value in shard.copy().items():
+                        self._retired[key] = self._retired.get(key, 0) + value
+            self._shards = live
+            shards = [self._retired] + [shard for _, shard in live]
+
+        for shard in shards:
+            for key, value in shard.copy().items():
+                totals[key] = totals.get(key, 0) + value
+
+        for collect in list(self._collectors.values()):
+            for name, labels, value in collect():
+                totals[(name, tuple(labels.items()), None)] = value
+        return totals
+
+    def flush(self, force=False):
+        """Write this worker's snapshot for the other workers to merge"""
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+
+        rows = [
+            [name, labels, part, value]
+            for (name, labels, part), value in self.snapshot().items()
+        ]
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(rows, f)
+        os.replace(tmp_path, path)
+
+    def merged(self):
+        """Combine the snapshots of all workers"""
+        if not self.directory:
+            return self.snapshot()
+
+        self.flush(force=True)
+        totals = {}
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            pid = int(os.path.basename(path)[len("metrics-") : -len(".json")])
+            alive = _pid_alive(pid)
+            try:
+                with open(path) as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, part, value in rows:
+                if self._meta.get(name, ("gauge",))[0] == "gauge" and not alive:
+                    continue
+                key = (name, tuple(tuple(label) for label in labels), part)
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        series = {}
+        for (name, labels, part), value in self.merged().items():
+            series.setdefault(name, {}).setdefault(labels, {})[part] = value
+
+        lines = []
+        for name in sorted(series):
+            kind, description, buckets = self._meta.get(name, ("untyped", "", None))
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, parts in sorted(series[name].items()):
+                if kind != "histogram":
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(parts[None])}"
+                    )
+                    continue
+                cumulative = 0
+                for index, bound in enumerate(buckets + (float("inf"),)):
+                    cumulative += parts.get(index, 0)
+                    bucket_labels = _format_labels(
+                        labels + (("le", _format_value(float(bound))),)
+                    )
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(
+                    f"{name}_sum{_format_labels(labels)} {_format_value(parts.get('sum', 0))}"
+                )
+                lines.append(
+                    f"{name}_count{_format_labels(labels)} {parts.get('count', 0)}"
+                )
+        return "\n".join(lines) + "\n"
+
+    # Flask integration
+
+    def init_app(self, app):
+        from exts import db
+
+        app.config.setdefault("METRICS_MULTIPROC_DIR", None)
+        app.config.setdefault("METRICS_FLUSH_INTERVAL", 5)
+        self.directory = app.config["METRICS_MULTIPROC_DIR"]
+        self.flush_interval = app.config["METRICS_FLUSH_INTERVAL"]
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        app.extensions["metrics"] = self
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+        app.add_url_rule("/metrics", "metrics", self._metrics_view)
+
+        @self.collector
+        def response_cache():
+            compression = app.extensions.get("compression")
+            if compression is None or compression.cache is None:
+                return []
+            stats = compression.cache.stats()
+            return [
+                ("response_cache_hits_total", {}, stats["hits"]),
+                ("response_cache_misses_total", {}, stats["misses"]),
+                ("response_cache_entries", {}, stats["entries"]),
+                ("response_cache_coalesced_total", {}, compression.flights.shared),
+            ]
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._before_cursor)
+                event.listen(engine, "after_cursor_execute", self._after_cursor)
+
+    @staticmethod
+    def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+        # Kept on the statement's context, nothing is left behind when it fails
+        if context is not None:
+            context._metrics_start = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if has_request_context():
+            g.db_statements = g.get("db_statements", 0) + 1
+            g.db_seconds = g.get("db_seconds", 0.0) + elapsed
+
+    @staticmethod
+    def _start_request():
+        g.request_start = time.perf_counter()
+
+    def _end_request(self, response):
+        start = g.get("request_start")
+        if start is None:
+            return response
+
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        namespace = namespace_for(route)
+        self.observe(
+            "http_request_duration_seconds",
+            time.perf_counter() - start,
+            namespace=namespace,
+            route=route,
+            method=request.method,
+        )
+        self.inc(
+            "http_requests_total",
+            namespace=namespace,
+            route=route,
+            method=request.method,
+            status=str(response.status_code),
+        )
+        self.observe(
+            "http_request_db_statements",
+            g.get("db_statements", 0),
+            namespace=namespace,
+            route=route,
+        )
+        self.observe(
+            "http_request_db_seconds",
+            g.get("db_seconds", 0.0),
+            namespace=namespace,
+            route=route,
+        )
+        self.flush()
+        return response
+
+    def _metrics_view(self):
+        return current_app.response_class(
+            self.render(), mimetype="text/plain; version=0.0.4"
+        )
+
+
+_namespaces = {}
+
+
+def namespace_for(route):
+    """Name of the flask-restx namespace serving a route"""
+    if route not in _namespaces:
+        name = "root"
+        api = current_app.extensions.get("api")
+        longest = 0
+        for namespace in api.namespaces if api else ():
+            path = api.ns_paths.get(namespace, namespace.path)
+            if path and route.startswith(path) and len(path) > longest:
+                name, longest = namespace.name, len(path)
+        _namespaces[route] = name
+    return _namespaces[route]
+
+
+metrics = Metrics()
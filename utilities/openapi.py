@@ -0,0 +1,51 @@
+import os
+from threading import Lock
+
+
+def build_spec(api, app):
+    """Generate the serialized OpenAPI spec for an API"""
+    with app.test_request_context():
+        return app.json.dumps(api.__schema__, sort_keys=False).encode("utf-8")
+
+
+def export_spec(api, app, path):
+    """Write the serialized OpenAPI spec to a file, usually at build time"""
+    body = build_spec(api, app)
+    with open(path, "wb") as f:
+        f.write(body)
+    return len(body)
+
+
+def register_spec(api, app):
+    """
+    Serve ``/swagger.json`` from a spec serialized once per process.
+
+    The spec is read from ``OPENAPI_SPEC_PATH`` when that file exists, otherwise
+    it is generated from the API. With ``OPENAPI_LAZY`` the work happens on the
+    first request for the spec instead of during startup.
+    """
+    path = app.config.get("OPENAPI_SPEC_PATH")
+    lock = Lock()
+    spec = {}
+
+    def load():
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        return build_spec(api, app)
+
+    def get_body():
+        if "body" not in spec:
+            with lock:
+                if "body" not in spec:
+                    spec["body"] = load()
+        return spec["body"]
+
+    def specs():
+        return app.response_class(get_body(), mimetype="application/json")
+
+    specs.cache_response = True
+    app.view_functions[api.endpoint("specs")] = specs
+
+    if not app.config.get("OPENAPI_LAZY"):
+        get_body()
@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+
+from flask import current_app, request
+
+from exts import db
+
+COUNT_MODES = ("exact", "cached", "none")
+
+
+class TotalCache:
+    """
+    Per-worker cache of pagination totals.
+
+    A missing total is counted right away. A total older than
+    ``PAGINATION_TOTAL_TTL`` is still returned while a background thread
+    counts again, so only the first request for a key waits on the count.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._refreshing = set()
+
+    def get(self, key, query):
+        entry = self._totals.get(key)
+        if entry is None:
+            return self._count(key, query)
+
+        total, counted_at = entry
+        if time.monotonic() - counted_at > current_app.config["PAGINATION_TOTAL_TTL"]:
+            self._refresh(key, query)
+        return total
+
+    def clear(self):
+        self._totals.clear()
+
+    def _count(self, key, query):
+        total = query.order_by(None).count()
+        self._totals[key] = (total, time.monotonic())
+        return total
+
+    def _refresh(self, key, query):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    try:
+                        self._count(key, query.with_session(db.session()))
+                    finally:
+                        db.session.remove()
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+
+total_cache = TotalCache()
+
+
+def count_mode():
+    """Pagination count mode of the current request"""
+    mode = request.args.get("count", current_app.config["PAGINATION_COUNT"])
+    return mode if mode in COUNT_MODES else "exact"
+
+
+def paginate(query, resource_name, page, per_page, count=None, key=None):
+    """
+    Build the ``create_pagination_model`` envelope for a page of a query.
+
+    Without an exact count, ``per_page + 1`` rows are fetched to tell if there
+    is a next page. ``cached`` totals are stored under ``key``, without one
+    the total is counted exactly. ``none`` leaves ``total`` and ``pages`` empty.
+    """
+    count = count or count_mode()
+    if count == "cached" and key is None:
+        count = "exact"
+    page, per_page = max(page, 1), max(per_page, 1)
+
+    if count == "exact":
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        return {
+            "total": pagination.total,
+            "pages": pagination.pages,
+            "page": page,
+            "per_page": per_page,
+            "has_next": pagination.has_next,
+            resource_name: pagination.items,
+        }
+
+    items = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    total = pages = None
+    if count == "cached":
+        total = total_cache.get(key, query)
+        pages = math.ceil(total / per_page)
+    return {
+        "total": total,
+        "pages": pages,
+        "page": page,
+        "per_page": per_page,
+        "has_next": len(items) > per_page,
+        resource_name: items[:per_page],
+    }
@@ -10,6 +10,7 @@ def create_pagination_model(api, resource_name, item_model):
             "pages": fields.Integer,
             "page": fields.Integer,
             "per_page": fields.Integer,
+            "has_next": fields.Boolean,
             resource_name.lower(): fields.List(fields.Nested(item_model)),
         },
     )
@@ -0,0 +1,128 @@
+import re
+import time
+from functools import lru_cache
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .metrics import metrics
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+")
+_SPACES = re.compile(r"\s+")
+
+
+class QueryProfileError(Exception):
+    """Raised in strict mode when a request repeats the same query too often"""
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement):
+    """Normalize a statement so queries differing only in values compare equal"""
+    sql = _LITERALS.sub("?", statement)
+    sql = _PLACEHOLDERS.sub("?", sql)
+    sql = _IN_LISTS.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+class QueryProfiler:
+    """
+    Request-scoped SQL profiler.
+
+    Statements are grouped by fingerprint. A SELECT fingerprint repeated more
+    than ``QUERY_N_PLUS_ONE_THRESHOLD`` times in one request is reported as an
+    N+1, and any statement slower than ``QUERY_SLOW_MS`` is logged. Samples are
+    fingerprints, so parameter values never reach the logs. With
+    ``QUERY_PROFILER_STRICT`` an N+1 raises :class:`QueryProfileError`.
+    """
+
+    def init_app(self, app):
+        from exts import db
+
+        app.config.setdefault("QUERY_PROFILER", True)
+        app.config.setdefault("QUERY_N_PLUS_ONE_THRESHOLD", 10)
+        app.config.setdefault("QUERY_SLOW_MS", 200)
+        app.config.setdefault("QUERY_PROFILER_STRICT", False)
+        if not app.config["QUERY_PROFILER"]:
+            return
+
+        metrics.counter("db_n_plus_one_total", "Requests with repeated queries")
+        metrics.counter("db_slow_queries_total", "Statements over the slow threshold")
+
+        app.extensions["query_profiler"] = self
+        app.after_request(self.check_request)
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._before_cursor)
+                event.listen(engine, "after_cursor_execute", self._after_cursor)
+
+    @staticmethod
+    def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+        # Kept on the statement's context, nothing is left behind when it fails
+        if context is not None:
+            context._profiler_start = time.perf_counter()
+
+    def _after_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_profiler_start", None)
+        if start is None or not has_request_context():
+            return
+        elapsed = time.perf_counter() - start
+
+        sql = fingerprint(statement)
+        profile = g.setdefault("query_profile", {})
+        stats = profile.get(sql)
+        if stats is None:
+            profile[sql] = [1, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+
+        if elapsed * 1000 >= current_app.config["QUERY_SLOW_MS"]:
+            metrics.inc("db_slow_queries_total", endpoint=str(request.endpoint))
+            current_app.logger.warning(
+                "Slow query (%.1f ms) in %s %s [%s]: %s",
+                elapsed * 1000,
+                request.method,
+                request.path,
+                request.endpoint,
+                sql,
+            )
+
+    def check_request(self, response):
+        profile = g.pop("query_profile", None)
+        if not profile:
+            return response
+
+        threshold = current_app.config["QUERY_N_PLUS_ONE_THRESHOLD"]
+        repeated = [
+            (count, total, sql)
+            for sql, (count, total) in profile.items()
+            if count > threshold and sql.upper().startswith("SELECT")
+        ]
+        if not repeated:
+            return response
+
+        metrics.inc("db_n_plus_one_total", endpoint=str(request.endpoint))
+        for count, total, sql in sorted(repeated, reverse=True):
+            current_app.logger.warning(
+                "Possible N+1: %d similar queries (%.1f ms) in %s %s [%s]: %s",
+                count,
+                total * 1000,
+                request.method,
+                request.path,
+                request.endpoint,
+                sql,
+            )
+
+        if current_app.config["QUERY_PROFILER_STRICT"]:
+            count, _, sql = max(repeated)
+            raise QueryProfileError(
+                f"{request.endpoint} ran {count} similar queries "
+                f"(threshold {threshold}): {sql}"
+            )
+        return response
+
+
+query_profiler = QueryProfiler()
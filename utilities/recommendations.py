@@ -0,0 +1,170 @@
+"""
+"Frequently bought together" index built from order history.
+
+The distinct products a user ordered form their basket. ``co_purchase`` holds
+the sparse product by product matrix of how many users have both products in
+their basket, and ``related_product`` the top neighbors of each product, so
+serving them is one primary-key range scan.
+
+The matrix is built with set-based SQL, one self-join of baskets per batch of
+orders, and refreshed incrementally: orders past the stored watermark only add
+pairs involving a product new to the user's basket, so counts stay exact
+without rereading history. Cancelled orders are left out. Orders cancelled
+after they were indexed stay counted until the next ``--full`` rebuild.
+
+Order ids are handed out at insert but become visible at commit, so a
+transaction still open can commit an id below one already indexed. Only
+orders placed more than ``settle`` seconds ago are indexed, a lower id in
+flight would have been inserted even earlier and has committed by then.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+
+from exts import db
+from models import CacheVersion, CoPurchase, Order, RelatedProduct
+
+WATERMARK_NAME = "related_products"
+
+
+def _watermark(conn):
+    return (
+        conn.execute(
+            select(CacheVersion.version).where(CacheVersion.name == WATERMARK_NAME)
+        ).scalar()
+        or 0
+    )
+
+
+def _set_watermark(conn, order_id):
+    result = conn.execute(
+        update(CacheVersion.__table__)
+        .where(CacheVersion.name == WATERMARK_NAME)
+        .values(version=order_id)
+    )
+    if result.rowcount == 0:
+        conn.execute(
+            insert(CacheVersion.__table__).values(name=WATERMARK_NAME, version=order_id)
+        )
+
+
+def _pair_deltas(lo, hi):
+    """Co-purchase counts added by the orders with ids in (lo, hi]"""
+    counted = and_(Order.id <= hi, Order.status.is_distinct_from("cancelled"))
+    users = select(Order.user_id).where(Order.id > lo, counted)
+    baskets = (
+        select(Order.user_id, Order.product_id, func.min(Order.id).label("first_id"))
+        .where(Order.user_id.in_(users), counted)
+        .group_by(Order.user_id, Order.product_id)
+        .cte("baskets")
+    )
+    a, b = baskets.alias("a"), baskets.alias("b")
+    return (
+        select(
+            a.c.product_id,
+            b.c.product_id.label("other_id"),
+            func.count().label("count"),
+        )
+        .join_from(
+            a,
+            b,
+            and_(a.c.user_id == b.c.user_id, a.c.product_id != b.c.product_id),
+        )
+        .where(or_(a.c.first_id > lo, b.c.first_id > lo))
+        .group_by(a.c.product_id, b.c.product_id)
+    )
+
+
+def _upsert_counts(conn):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    statement = dialect_insert(CoPurchase)
+    return statement.on_conflict_do_update(
+        index_elements=[CoPurchase.product_id, CoPurchase.other_id],
+        set_={"count": CoPurchase.count + statement.excluded.count},
+    )
+
+
+def _rank(conn, product_ids, top_k):
+    """Rewrite the top neighbors of some products from their matrix rows"""
+    conn.execute(
+        delete(RelatedProduct).where(RelatedProduct.product_id.in_(product_ids))
+    )
+    ranked = (
+        select(
+            CoPurchase.product_id,
+            CoPurchase.other_id,
+            CoPurchase.count,
+            func.row_number()
+            .over(
+                partition_by=CoPurchase.product_id,
+                order_by=(CoPurchase.count.desc(), CoPurchase.other_id),
+            )
+            .label("rank"),
+        )
+        .where(CoPurchase.product_id.in_(product_ids))
+        .subquery()
+    )
+    conn.execute(
+        insert(RelatedProduct).from_select(
+            ["product_id", "rank", "related_id", "score"],
+            select(
+                ranked.c.product_id, ranked.c.rank, ranked.c.other_id, ranked.c.count
+            ).where(ranked.c.rank <= top_k),
+        )
+    )
+
+
+def refresh_related_products(
+    full=False, batch_size=50000, top_k=20, rank_batch=500, settle=60, progress=None
+):
+    """
+    Fold orders placed since the last run into the index, or rebuild it.
+
+    Orders placed in the last ``settle`` seconds are left for the next run.
+    The rest are read in id ranges of ``batch_size``, each committed with the
+    watermark, then the neighbors of every product whose counts moved are
+    ranked again. A run interrupted before ranking leaves those products on
+    their previous neighbors until they move again or the index is rebuilt.
+    Returns the last order id indexed and the number of pairs updated and
+    products ranked.
+    """
+    engine = db.engine
+    progress = progress or (lambda stage, done, total: None)
+    with engine.begin() as conn:
+        if full:
+            conn.execute(delete(CoPurchase))
+            conn.execute(delete(RelatedProduct))
+            _set_watermark(conn, 0)
+        lo = _watermark(conn)
+        settled = datetime.utcnow() - timedelta(seconds=settle)
+        hi = (
+            conn.execute(
+                select(func.max(Order.id)).where(Order.created_at <= settled)
+            ).scalar()
+            or 0
+        )
+
+    changed, pairs = set(), 0
+    for start in range(lo, hi, batch_size):
+        stop = min(start + batch_size, hi)
+        with engine.begin() as conn:
+            rows = [row._asdict() for row in conn.execute(_pair_deltas(start, stop))]
+            if rows:
+                conn.execute(_upsert_counts(conn), rows)
+            _set_watermark(conn, stop)
+        changed.update(row["product_id"] for row in rows)
+        pairs += len(rows)
+        progress("orders", stop - lo, hi - lo)
+
+    changed = sorted(changed)
+    for start in range(0, len(changed), rank_batch):
+        with engine.begin() as conn:
+            _rank(conn, changed[start : start + rank_batch], top_k)
+        progress("products", min(start + rank_batch, len(changed)), len(changed))
+
+    return {"last_order": max(hi, lo), "pairs": pairs, "products": len(changed)}
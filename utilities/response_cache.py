@@ -0,0 +1,81 @@
+import time
+from collections import OrderedDict
+from threading import Event, Lock
+
+
+class ResponseCache:
+    """A small thread-safe LRU cache with a time to live per entry"""
+
+    def __init__(self, max_entries=512, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Bumped by clear, so values computed before it are not stored after
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """Return the cached value for a key, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation=None):
+        """Store a value, evicting the least recently used entries when full"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        """Return hit, miss and size counters"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+class SingleFlight:
+    """Lets one caller per key do some work while concurrent callers wait on it"""
+
+    def __init__(self):
+        self.shared = 0
+        self._flights = {}
+        self._lock = Lock()
+
+    def lead(self, key):
+        """Return None when the caller now leads the key, else the leader's Event"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                self._flights[key] = Event()
+                return None
+            self.shared += 1
+            return flight
+
+    def land(self, key):
+        """End the flight for a key, waking its waiters"""
+        with self._lock:
+            flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.set()
@@ -0,0 +1,101 @@
+"""
+Rebuild of the daily sales rollups from the order table.
+
+Orders are split into id ranges that worker threads aggregate with one
+GROUP BY each, adding their totals to the rollups. On PostgreSQL the chunks
+run in parallel on their own connections. SQLite has a single writer, so
+there they run one after the other. Orders written during a rebuild may be
+counted twice, so run it while checkout is paused.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import delete, func, select
+
+from exts import db
+from models import DailyCategorySales, DailyProductSales, Order, Product
+from models.sales import EXCLUDED_STATUSES, MEASURES, increment_statement
+
+
+def _aggregate(engine, start, stop):
+    day = func.date(Order.created_at, type_=db.Date)
+    totals = (
+        select(
+            day.label("day"),
+            Order.product_id,
+            Product.category_id,
+            func.count().label("orders"),
+            func.sum(Order.quantity).label("units"),
+            func.sum(Order.quantity * Order.price).label("revenue"),
+        )
+        .outerjoin(Product, Product.id == Order.product_id)
+        .where(
+            Order.id > start,
+            Order.id <= stop,
+            Order.created_at.is_not(None),
+            Order.status.is_(None) | Order.status.not_in(EXCLUDED_STATUSES),
+        )
+        .group_by(day, Order.product_id, Product.category_id)
+    )
+
+    with engine.begin() as conn:
+        rows = conn.execute(totals).all()
+        if not rows:
+            return 0
+        conn.execute(
+            increment_statement(conn, DailyProductSales),
+            [
+                {"day": row.day, "product_id": row.product_id, **_measures(row)}
+                for row in rows
+            ],
+        )
+
+        by_category = {}
+        for row in rows:
+            key = (row.day, row.category_id)
+            previous = by_category.get(key)
+            by_category[key] = (
+                _measures(row)
+                if previous is None
+                else {name: previous[name] + getattr(row, name) for name in MEASURES}
+            )
+        category_rows = [
+            {"day": day, "category_id": category_id, **measures}
+            for (day, category_id), measures in by_category.items()
+            if category_id is not None
+        ]
+        if category_rows:
+            conn.execute(increment_statement(conn, DailyCategorySales), category_rows)
+    return len(rows)
+
+
+def _measures(row):
+    return {name: getattr(row, name) for name in MEASURES}
+
+
+def rebuild_sales_rollups(batch_size=100000, workers=None, progress=None):
+    """Recompute both rollups from scratch, returning the product rows written"""
+    engine = db.engine
+    progress = progress or (lambda done, total: None)
+    if engine.dialect.name == "sqlite":
+        workers = 1
+    workers = workers or min(4, os.cpu_count() or 1)
+
+    with engine.begin() as conn:
+        conn.execute(delete(DailyProductSales))
+        conn.execute(delete(DailyCategorySales))
+        last = conn.execute(select(func.max(Order.id))).scalar() or 0
+
+    chunks = [
+        (start, min(start + batch_size, last)) for start in range(0, last, batch_size)
+    ]
+    written, done = 0, 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (start, stop), rows in zip(
+            chunks, pool.map(lambda chunk: _aggregate(engine, *chunk), chunks)
+        ):
+            written += rows
+            done += stop - start
+            progress(done, last)
+    return written
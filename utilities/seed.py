@@ -0,0 +1,249 @@
+"""
+Synthetic data generator behind ``flask seed``.
+
+Rows are generated in chunks by a pool of worker processes and inserted by the
+parent with bulk INSERTs, one transaction per chunk. Each chunk draws from its
+own generator seeded with (seed, table, chunk), so the output does not depend
+on the number of workers and the same seed always produces the same database.
+
+Popularity is skewed: low category and product ids are drawn far more often
+than high ones, so a few categories hold most products and a long tail of
+products is rarely carted or ordered.
+"""
+
+import multiprocessing
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, text
+from werkzeug.security import generate_password_hash
+
+from exts import db
+from models import Cart, Category, Order, Product, ProductImage, User
+
+DEFAULT_PASSWORD = "seed-password"
+EPOCH = datetime(2025, 1, 1)
+SPAN_SECONDS = 365 * 24 * 3600
+ORDER_STATUSES = ("pending", "paid", "shipped", "delivered", "cancelled")
+ORDER_STATUS_WEIGHTS = (10, 15, 15, 55, 5)
+
+# Exponent of the popularity curve, higher values concentrate rows on low ids
+CATEGORY_SKEW = 2.5
+PRODUCT_SKEW = 3.0
+
+
+def _skewed(rng, n, skew):
+    """Draw an id in 1..n, low ids much more likely than high ones"""
+    return 1 + int(n * rng.random() ** skew)
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _timestamp(rng):
+    return EPOCH - timedelta(seconds=rng.randrange(SPAN_SECONDS))
+
+
+def _categories(rng, start, stop, counts, password_hash):
+    return [
+        {"id": i, "uuid": _uuid(rng), "name": f"Category {i}"}
+        for i in range(start, stop)
+    ]
+
+
+def _products(rng, start, stop, counts, password_hash):
+    rows = []
+    for i in range(start, stop):
+        price = round(rng.lognormvariate(3.5, 1.0), 2)
+        created = _timestamp(rng)
+        rows.append(
+            {
+                "id": i,
+                "uuid": _uuid(rng),
+                "product_name": f"Product {i}",
+                "description": f"Description of product {i}",
+                "current_price": price,
+                "previous_price": round(price * rng.uniform(1.0, 1.5), 2),
+                "in_stock": rng.randint(0, 500),
+                "flash_sale": rng.random() < 0.02,
+                "category_id": _skewed(rng, counts["categories"], CATEGORY_SKEW),
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+    return rows
+
+
+def _images(rng, start, stop, counts, password_hash):
+    rows = []
+    for i in range(start, stop):
+        created = _timestamp(rng)
+        rows.append(
+            {
+                "id": i,
+                "uuid": _uuid(rng),
+                "image_url": f"/media/product_images/{i}.jpg",
+                "product_id": _skewed(rng, counts["products"], PRODUCT_SKEW),
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+    return rows
+
+
+def _users(rng, start, stop, counts, password_hash):
+    rows = []
+    for i in range(start, stop):
+        created = _timestamp(rng)
+        rows.append(
+            {
+                "id": i,
+                "uuid": _uuid(rng),
+                "email": f"user{i}@example.com",
+                "username": f"user{i}",
+                "address": f"{rng.randint(1, 999)} Example Street",
+                "telephone": f"+2547{i:08d}",
+                "password_hash": password_hash,
+                "is_verified": rng.random() < 0.9,
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+    return rows
+
+
+def _carts(rng, start, stop, counts, password_hash):
+    rows = []
+    for i in range(start, stop):
+        created = _timestamp(rng)
+        rows.append(
+            {
+                "id": i,
+                "uuid": _uuid(rng),
+                "quantity": rng.randint(1, 5),
+                "user_id": rng.randint(1, counts["users"]),
+                "product_id": _skewed(rng, counts["products"], PRODUCT_SKEW),
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+    return rows
+
+
+def _orders(rng, start, stop, counts, password_hash):
+    rows = []
+    statuses = rng.choices(ORDER_STATUSES, ORDER_STATUS_WEIGHTS, k=stop - start)
+    for i, status in zip(range(start, stop), statuses):
+        created = _timestamp(rng)
+        quantity = rng.randint(1, 5)
+        rows.append(
+            {
+                "id": i,
+                "uuid": _uuid(rng),
+                "quantity": quantity,
+                "price": round(quantity * rng.lognormvariate(3.5, 1.0), 2),
+                "status": status,
+                "payment_id": f"pay_{i}" if status != "pending" else None,
+                "user_id": rng.randint(1, counts["users"]),
+                "product_id": _skewed(rng, counts["products"], PRODUCT_SKEW),
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+    return rows
+
+
+# Insert order respects foreign keys
+TABLES = (
+    ("categories", Category, _categories),
+    ("products", Product, _products),
+    ("images", ProductImage, _images),
+    ("users", User, _users),
+    ("carts", Cart, _carts),
+    ("orders", Order, _orders),
+)
+GENERATORS = {name: generate for name, _, generate in TABLES}
+REFERENCES = {
+    "products": ("categories",),
+    "images": ("products",),
+    "carts": ("users", "products"),
+    "orders": ("users", "products"),
+}
+
+
+def _generate_chunk(task):
+    name, start, stop, seed, counts, password_hash = task
+    rng = random.Random(f"{seed}:{name}:{start}")
+    return name, GENERATORS[name](rng, start, stop, counts, password_hash)
+
+
+def _tasks(counts, batch_size, seed, password_hash):
+    for name, _, _ in TABLES:
+        for start in range(1, counts[name] + 1, batch_size):
+            stop = min(start + batch_size, counts[name] + 1)
+            yield name, start, stop, seed, counts, password_hash
+
+
+def is_empty():
+    """Check that none of the seeded tables hold rows yet"""
+    return all(
+        db.session.query(func.count(model.id)).scalar() == 0 for _, model, _ in TABLES
+    )
+
+
+def _advance_sequences(engine, models):
+    """Move Postgres id sequences past the explicit ids just inserted"""
+    with engine.begin() as conn:
+        for model in models:
+            table = conn.dialect.identifier_preparer.quote(model.__tablename__)
+            conn.execute(
+                text(
+                    "SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+                    f"(SELECT max(id) FROM {table}))"
+                ),
+                {"table": table},
+            )
+
+
+def seed_database(
+    counts,
+    seed=1234,
+    batch_size=20000,
+    workers=None,
+    password=DEFAULT_PASSWORD,
+    progress=None,
+):
+    """
+    Fill empty tables with ``counts[name]`` rows each, inside an app context.
+
+    Returns the number of rows inserted per table.
+    """
+    counts = {name: counts.get(name, 0) for name, _, _ in TABLES}
+    for name, references in REFERENCES.items():
+        for reference in references:
+            if counts[name] and not counts[reference]:
+                raise ValueError(f"Cannot seed {name} without {reference}")
+
+    # Hashing is slow, every seeded user shares one password
+    password_hash = generate_password_hash(password)
+    models = {name: model for name, model, _ in TABLES}
+    inserted = {name: 0 for name in counts}
+    engine = db.engine
+    db.session.close()
+
+    tasks = _tasks(counts, batch_size, seed, password_hash)
+    with multiprocessing.Pool(workers or multiprocessing.cpu_count()) as pool:
+        # imap keeps chunks in order, so referenced rows are inserted first
+        for name, rows in pool.imap(_generate_chunk, tasks):
+            with engine.begin() as conn:
+                conn.execute(insert(models[name]), rows)
+            inserted[name] += len(rows)
+            if progress:
+                progress(name, inserted[name], counts[name])
+
+    if engine.dialect.name == "postgresql":
+        # Rows carry explicit ids, which don't advance the sequences
+        _advance_sequences(engine, [models[name] for name in counts if inserted[name]])
+    return inserted
@@ -0,0 +1,163 @@
+from functools import wraps
+from http import HTTPStatus
+
+from flask import current_app, request
+from flask_restx import fields
+from flask_restx.inputs import boolean
+from flask_restx.mask import Mask
+from flask_restx.utils import merge, unpack
+from werkzeug.wrappers import Response
+
+# Compiled serializers keyed by model identity
+_compiled = {}
+
+
+def _scalar(format_value, default):
+    """Build a converter for a scalar field"""
+    if default:
+        default = format_value(default)
+
+    def convert(value):
+        if value is None:
+            return default
+        return format_value(value)
+
+    return convert
+
+
+def _nested(serializer, default):
+    """Build a converter for a nested field"""
+
+    def convert(value):
+        if value is None and default is not None:
+            return default
+        return serializer(value)
+
+    return convert
+
+
+def _nested_list(serializer, default):
+    """Build a converter for a list of nested fields"""
+
+    def convert(value):
+        if value is None:
+            return default
+        return [serializer(item) for item in value]
+
+    return convert
+
+
+def _compile_field(field):
+    """Turn a flask-restx field into a plain value converter"""
+    if isinstance(field, type):
+        field = field()
+
+    if isinstance(field, fields.Nested):
+        return _nested(compile_model(field.nested), field.default)
+
+    if isinstance(field, fields.List) and isinstance(field.container, fields.Nested):
+        return _nested_list(compile_model(field.container.nested), field.default)
+
+    if isinstance(field, fields.Boolean):
+        return _scalar(boolean, field.default)
+    if isinstance(field, fields.Integer):
+        return _scalar(int, field.default)
+    if isinstance(field, fields.Float):
+        return _scalar(float, field.default)
+    if isinstance(field, fields.String):
+        return _scalar(str, field.default)
+
+    # Anything else keeps the flask-restx formatting
+    return None
+
+
+def _fallback(key, field):
+    """Keep the flask-restx output for fields the compiler does not handle"""
+
+    def convert(obj):
+        return field.output(key, obj)
+
+    return convert
+
+
+def compile_model(model):
+    """Compile a flask-restx model once into a flat object-to-dict function"""
+    if id(model) in _compiled:
+        return _compiled[id(model)][1]
+
+    plan = []
+    for key, field in model.items():
+        attribute = getattr(field, "attribute", None) or key
+        converter = _compile_field(field)
+        if converter is None or not isinstance(attribute, str) or "." in attribute:
+            plan.append((key, None, _fallback(key, field)))
+        else:
+            plan.append((key, attribute, converter))
+    plan = tuple(plan)
+
+    def serialize(obj):
+        if isinstance(obj, dict):
+            return {
+                key: convert(obj.get(attribute)) if attribute else convert(obj)
+                for key, attribute, convert in plan
+            }
+        return {
+            key: convert(getattr(obj, attribute, None)) if attribute else convert(obj)
+            for key, attribute, convert in plan
+        }
+
+    _compiled[id(model)] = (model, serialize)
+    return serialize
+
+
+def serialize(data, model):
+    """Serialize an object or a list of objects with a compiled model"""
+    serializer = compile_model(model)
+    if isinstance(data, (list, tuple)):
+        return [serializer(item) for item in data]
+    return serializer(data)
+
+
+def serialize_with(model, as_list=False, code=HTTPStatus.OK, description=None):
+    """
+    Drop-in replacement for ``Namespace.marshal_with`` on hot endpoints.
+
+    Documents the response exactly like ``marshal_with`` so the OpenAPI spec is
+    unchanged, but serializes with the precompiled model. A field mask header
+    filters the serialized output, ``marshal`` would read named tuples as lists.
+    """
+
+    def wrapper(func):
+        doc = {
+            "responses": {
+                str(code): (
+                    (description, [model], {}) if as_list else (description, model, {})
+                )
+            },
+            "__mask__": True,
+        }
+        func.__apidoc__ = merge(getattr(func, "__apidoc__", {}), doc)
+        compile_model(model)
+
+        def convert(data):
+            mask = request.headers.get(current_app.config["RESTX_MASK_HEADER"])
+            if not mask:
+                return serialize(data, model)
+            mask = Mask(mask)
+            # Raises MaskError when the mask does not fit the model, as marshal does
+            mask.apply(model)
+            return mask.apply(serialize(data, model))
+
+        @wraps(func)
+        def decorated(*args, **kwargs):
+            resp = func(*args, **kwargs)
+            if isinstance(resp, Response):
+                return resp
+            if isinstance(resp, tuple):
+                data, status, headers = unpack(resp)
+                return convert(data), status, headers
+            return convert(resp)
+
+        return decorated
+
+    return wrapper
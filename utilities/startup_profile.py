@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Runs in a fresh interpreter so imports are really cold
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import config, main
+imported = time.perf_counter()
+app = main.create_app(getattr(config, sys.argv[1]))
+created = time.perf_counter()
+status = app.test_client().get(sys.argv[2]).status_code
+responded = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "create_app_s": created - imported,
+    "first_response_s": responded - created,
+    "total_s": responded - start,
+    "status": status,
+}))
+"""
+
+
+def _parse_importtime(stderr):
+    """Parse ``-X importtime`` output into (cumulative_us, self_us, module) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:") :].split("|")
+            rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_startup(config_name="ProdConfig", path="/welcome", env=None):
+    """
+    Measure a cold start in a fresh interpreter.
+
+    Returns the import, app factory and first response timings along with the
+    per-module import costs reported by ``python -X importtime``.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, config_name, path],
+        cwd=BASE_DIR,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup profile failed:\n{result.stderr[-2000:]}")
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["imports"] = _parse_importtime(result.stderr)
+    return timings
+
+
+def format_profile(timings, top=15):
+    """Render a startup profile as text"""
+    lines = [
+        f"imports       {timings['import_s'] * 1000:8.1f} ms",
+        f"create_app    {timings['create_app_s'] * 1000:8.1f} ms",
+        f"first request {timings['first_response_s'] * 1000:8.1f} ms"
+        f" (status {timings['status']})",
+        f"total         {timings['total_s'] * 1000:8.1f} ms",
+        "",
+        f"Top {top} packages by import time:",
+    ]
+    packages = {}
+    for _, self_us, module in timings["imports"]:
+        package = module.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    for package, self_us in ranked[:top]:
+        lines.append(f"  {self_us / 1000:8.1f} ms  {package}")
+    return "\n".join(lines)
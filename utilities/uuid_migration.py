@@ -0,0 +1,170 @@
+"""
+Online conversion of text uuid columns to the BinaryUUID storage.
+
+SQLite converts rows in place: its columns accept blobs whatever their
+declared type, so each chunk is a short write transaction and the app keeps
+serving in between. Run the workers with ``UUID_LEGACY_LOOKUPS=true`` until
+the conversion finishes, so lookups also match rows not converted yet.
+
+PostgreSQL uses expand and contract: a ``uuid_new`` column kept in sync by a
+trigger is backfilled in chunks and indexed concurrently, then swapped in with
+one short ACCESS EXCLUSIVE transaction.
+"""
+
+import time
+import uuid
+
+from sqlalchemy import text
+
+from exts import db
+from models.types import BinaryUUID
+
+
+def uuid_tables():
+    """Tables with a BinaryUUID ``uuid`` column"""
+    return [
+        table
+        for table in db.metadata.sorted_tables
+        if "uuid" in table.c and isinstance(table.c.uuid.type, BinaryUUID)
+    ]
+
+
+def _to_bytes(value):
+    try:
+        return uuid.UUID(value).bytes
+    except ValueError:
+        return None
+
+
+def _convert_sqlite(engine, table, batch_size, pause, progress):
+    select_chunk = text(
+        f'SELECT id, uuid FROM "{table.name}" '
+        "WHERE id > :last AND typeof(uuid) = 'text' ORDER BY id LIMIT :limit"
+    )
+    update = text(f'UPDATE "{table.name}" SET uuid = :value WHERE id = :id')
+
+    converted, last = 0, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select_chunk, {"last": last, "limit": batch_size}).all()
+            if not rows:
+                break
+            params = [{"id": id, "value": _to_bytes(value)} for id, value in rows]
+            invalid = [row["id"] for row in params if row["value"] is None]
+            if invalid:
+                raise ValueError(f"{table.name} rows {invalid} hold invalid uuids")
+            conn.execute(update, params)
+        converted += len(rows)
+        last = rows[-1].id
+        progress(table.name, converted)
+        time.sleep(pause)
+    return converted
+
+
+def _convert_postgresql(engine, table, batch_size, pause, progress):
+    name = table.name
+    with engine.connect() as conn:
+        data_type = conn.execute(
+            text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = :table AND column_name = 'uuid'"
+            ),
+            {"table": name},
+        ).scalar()
+    if data_type == "uuid":
+        return 0
+
+    # Expand: a new column, filled by a trigger for rows written meanwhile
+    with engine.begin() as conn:
+        conn.execute(
+            text(f'ALTER TABLE "{name}" ADD COLUMN IF NOT EXISTS uuid_new uuid')
+        )
+        conn.execute(
+            text(
+                f"CREATE OR REPLACE FUNCTION {name}_uuid_new() RETURNS trigger AS $$ "
+                "BEGIN NEW.uuid_new := NEW.uuid::uuid; RETURN NEW; END $$ "
+                "LANGUAGE plpgsql"
+            )
+        )
+        conn.execute(text(f'DROP TRIGGER IF EXISTS {name}_uuid_new ON "{name}"'))
+        conn.execute(
+            text(
+                f'CREATE TRIGGER {name}_uuid_new BEFORE INSERT OR UPDATE OF uuid ON "{name}" '
+                f"FOR EACH ROW EXECUTE FUNCTION {name}_uuid_new()"
+            )
+        )
+        last_id = conn.execute(text(f'SELECT max(id) FROM "{name}"')).scalar() or 0
+
+    # Backfill by id range, one short transaction per chunk
+    converted = 0
+    for start in range(0, last_id, batch_size):
+        with engine.begin() as conn:
+            result = conn.execute(
+                text(
+                    f'UPDATE "{name}" SET uuid_new = uuid::uuid '
+                    "WHERE id > :start AND id <= :stop AND uuid_new IS NULL"
+                ),
+                {"start": start, "stop": start + batch_size},
+            )
+        converted += result.rowcount
+        progress(name, converted)
+        time.sleep(pause)
+
+    # Index and NOT NULL check built without blocking writes
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(
+            text(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {name}_uuid_new_key "
+                f'ON "{name}" (uuid_new)'
+            )
+        )
+        conn.execute(
+            text(
+                f'ALTER TABLE "{name}" ADD CONSTRAINT {name}_uuid_new_not_null '
+                "CHECK (uuid_new IS NOT NULL) NOT VALID"
+            )
+        )
+        conn.execute(
+            text(f'ALTER TABLE "{name}" VALIDATE CONSTRAINT {name}_uuid_new_not_null')
+        )
+
+    # Contract: swap the columns in one short transaction
+    with engine.begin() as conn:
+        conn.execute(text(f'LOCK TABLE "{name}" IN ACCESS EXCLUSIVE MODE'))
+        conn.execute(text(f'DROP TRIGGER {name}_uuid_new ON "{name}"'))
+        conn.execute(text(f"DROP FUNCTION {name}_uuid_new()"))
+        conn.execute(text(f'ALTER TABLE "{name}" DROP COLUMN uuid'))
+        conn.execute(text(f'ALTER TABLE "{name}" RENAME COLUMN uuid_new TO uuid'))
+        conn.execute(text(f'ALTER TABLE "{name}" ALTER COLUMN uuid SET NOT NULL'))
+        conn.execute(
+            text(f'ALTER TABLE "{name}" DROP CONSTRAINT {name}_uuid_new_not_null')
+        )
+        conn.execute(
+            text(
+                f'ALTER TABLE "{name}" ADD CONSTRAINT {name}_uuid_key '
+                f"UNIQUE USING INDEX {name}_uuid_new_key"
+            )
+        )
+    return converted
+
+
+CONVERTERS = {"sqlite": _convert_sqlite, "postgresql": _convert_postgresql}
+
+
+def migrate_uuids(batch_size=5000, pause=0.0, progress=None):
+    """
+    Convert every text uuid to BinaryUUID storage, inside an app context.
+
+    Returns the number of rows converted per table.
+    """
+    engine = db.engine
+    convert = CONVERTERS.get(engine.dialect.name)
+    if convert is None:
+        raise ValueError(f"Unsupported database: {engine.dialect.name}")
+
+    db.session.close()
+    progress = progress or (lambda table, converted: None)
+    return {
+        table.name: convert(engine, table, batch_size, pause, progress)
+        for table in uuid_tables()
+    }